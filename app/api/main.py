@@ -1,8 +1,7 @@
 from fastapi import APIRouter
 
-from app.api.routes import root, chat, legacy_chat
+from app.api.routes import root, chat
 
 api_router = APIRouter()
 api_router.include_router(root.router)
-api_router.include_router(chat.router)
-api_router.include_router(legacy_chat.router)
\ No newline at end of file
+api_router.include_router(chat.router)
\ No newline at end of file
@@ -1,26 +1,36 @@
+import asyncio
 from datetime import UTC, datetime
-from typing import Optional, List
+from typing import Optional, List, Tuple
 
-from fastapi import APIRouter, HTTPException
+import orjson
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field
 
+from app.api.sse import sse_event, stream_in_background
 from app.core.llm import (
     MessageRole,
     Message,
     CharacterContext,
+    CharacterResponse,
+    Conversation,
     get_conversation,
+    get_conversation_raw,
     save_conversation,
-    create_new_conversation,
     delete_conversation,
     get_all_conversation_ids,
+    count_conversations,
+    get_conversation_summaries,
     generate_character_response,
+    stream_character_response,
+    parse_character_response,
     get_character,
+    get_character_context,
     get_all_characters,
 )
 
 router = APIRouter(prefix="/chat")
 
-
 class ChatRequest(BaseModel):
     """Request model for chat messages"""
 
@@ -59,179 +69,251 @@ class CharacterGenerationRequest(BaseModel):
     """Request model for character generation"""
     theme: str = Field(..., description="Theme for character generation")
     num_characters: int = Field(..., description="Number of characters to generate")
+    force_refresh: bool = Field(
+        False, description="Generate new characters even if this theme was generated recently"
+    )
 
 
 async def get_character_context_from_redis(character_id: str) -> CharacterContext:
     """Get character context from Redis using UUID"""
-    character_data = await get_character(character_id)
-    if not character_data:
+    character_context = await get_character_context(character_id)
+    if not character_context:
         raise HTTPException(status_code=404, detail="Character not found")
-    
-    return CharacterContext(
-        name=character_data["name"],
-        mental_state=character_data["mental_state"],
-        problems=character_data["problems"],
-        background=character_data["background"],
-        interaction_warning=character_data["interaction_warning"],
+    return character_context
+
+
+async def _load_conversation(conversation_id: Optional[str], character_id: str) -> Conversation:
+    """Fetch the conversation to continue, or start a new one if no ID is given"""
+    if not conversation_id:
+        return Conversation(character_id=character_id)
+
+    conversation = await get_conversation(conversation_id)
+    if not conversation:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    return conversation
+
+
+async def _load_turn(
+    character_id: str, conversation_id: Optional[str], conversation_first: bool = False
+) -> Tuple[CharacterContext, Conversation]:
+    """
+    Fetch the character context and conversation concurrently.
+
+    Their errors are raised in a fixed order, the character's first unless
+    conversation_first is set, and the other lookup is cancelled on failure.
+    """
+    character_task = asyncio.create_task(get_character_context_from_redis(character_id))
+    conversation_task = asyncio.create_task(_load_conversation(conversation_id, character_id))
+    tasks = [conversation_task, character_task] if conversation_first else [character_task, conversation_task]
+    try:
+        for task in tasks:
+            await task
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+            # Retrieve the outcome so a lookup that also failed is not reported
+            task.add_done_callback(lambda task: task.cancelled() or task.exception())
+        raise
+    return character_task.result(), conversation_task.result()
+
+
+async def _complete_turn(
+    conversation: Conversation, message: str, character_response: CharacterResponse
+) -> dict:
+    """Record the character's response on the conversation, save it and build the chat payload"""
+    now = datetime.now(UTC)
+    assistant_message = Message.model_construct(
+        role=MessageRole.ASSISTANT, content=character_response.comment, timestamp=now
     )
+    conversation.messages.append(assistant_message)
+
+    conversation.apply_emotional_change(character_response.emotional_change)
+
+    conversation.updated_at = now
+    if not conversation.title and len(conversation.messages) == 2:
+        conversation.title = f"Therapy Session: {message[:30]}..."
+
+    await save_conversation(conversation)
+
+    return {
+        "conversation_id": conversation.id,
+        "message_id": assistant_message.id,
+        "response": character_response.comment,
+        # Serialized as in the stored messages, so the timestamp reads the same in both
+        "timestamp": assistant_message.model_dump(mode="json", include={"timestamp"})["timestamp"],
+        "emotional_change": character_response.emotional_change,
+        "emotional_state": conversation.emotional_state,
+        "session_ended": conversation.session_ended,
+    }
 
 
-@router.post("/conversations", response_model=ChatResponse)
+@router.post("/conversations", responses={200: {"model": ChatResponse}})
 async def start_conversation(request: ChatRequest):
     """Start a new therapy session or continue an existing one"""
 
-    character_context = await get_character_context_from_redis(request.character_id)
-
-    if request.conversation_id:
-        conversation = await get_conversation(request.conversation_id)
-        if not conversation:
-            raise HTTPException(status_code=404, detail="Conversation not found")
-    else:
-        conversation = await create_new_conversation(request.character_id)
+    character_context, conversation = await _load_turn(
+        request.character_id, request.conversation_id
+    )
 
-    user_message = Message(role=MessageRole.USER, content=request.message)
+    user_message = Message.model_construct(role=MessageRole.USER, content=request.message)
     conversation.messages.append(user_message)
 
     character_response = await generate_character_response(
         messages=conversation.messages, 
         character_context=character_context,
-        current_emotional_state=conversation.emotional_state
+        current_emotional_state=conversation.emotional_state,
+        character_id=request.character_id,
     )
 
-    assistant_message = Message(
-        role=MessageRole.ASSISTANT, content=character_response.comment
-    )
-    conversation.messages.append(assistant_message)
+    return ORJSONResponse(await _complete_turn(conversation, request.message, character_response))
 
-    new_emotional_state = conversation.emotional_state + character_response.emotional_change
-    conversation.emotional_state = max(0, min(100, new_emotional_state))
 
-    conversation.updated_at = datetime.now(UTC)
-    if not conversation.title and len(conversation.messages) == 2:
-        conversation.title = f"Therapy Session: {request.message[:30]}..."
+async def _run_streamed_turn(
+    conversation: Conversation,
+    character_context: CharacterContext,
+    message: str,
+    events: asyncio.Queue,
+):
+    """Generate a streamed character response, forwarding deltas to the event queue"""
+    try:
+        chunks = []
+        async for delta in stream_character_response(
+            messages=conversation.messages,
+            character_context=character_context,
+            current_emotional_state=conversation.emotional_state,
+        ):
+            chunks.append(delta)
+            events.put_nowait(sse_event("delta", delta))
+
+        character_response = parse_character_response("".join(chunks))
+        payload = await _complete_turn(conversation, message, character_response)
+        events.put_nowait(sse_event("final", payload))
+    except Exception as e:
+        events.put_nowait(sse_event("error", {"detail": str(e)}))
 
-    await save_conversation(conversation)
 
-    session_ended = conversation.emotional_state <= 0 or conversation.emotional_state >= 100
+@router.post("/conversations/stream")
+async def stream_conversation(request: ChatRequest):
+    """
+    Start or continue a therapy session, streaming the character's reply.
 
-    return ChatResponse(
-        conversation_id=conversation.id,
-        message_id=assistant_message.id,
-        response=character_response.comment,
-        timestamp=assistant_message.timestamp,
-        emotional_change=character_response.emotional_change,
-        emotional_state=conversation.emotional_state,
-        session_ended=session_ended,
+    Responds with server-sent events: one "delta" event per chunk of the raw
+    JSON response as the LLM generates it, then a "final" event carrying the
+    same payload as POST /conversations. The turn is generated and saved in a
+    background task, so it is recorded even if the client disconnects early.
+    """
+
+    character_context, conversation = await _load_turn(
+        request.character_id, request.conversation_id
+    )
+
+    user_message = Message.model_construct(role=MessageRole.USER, content=request.message)
+    conversation.messages.append(user_message)
+
+    return stream_in_background(
+        lambda events: _run_streamed_turn(conversation, character_context, request.message, events)
     )
 
 
 @router.get("/conversations")
-async def list_conversations():
-    """List all therapy sessions"""
-    conversation_list = []
-    conversation_ids = await get_all_conversation_ids()
-    
-    for conv_id in conversation_ids:
-        conv = await get_conversation(conv_id)
-        if conv:
-            conversation_list.append(
-                {
-                    "id": conv.id,
-                    "title": conv.title,
-                    "message_count": len(conv.messages),
-                    "created_at": conv.created_at,
-                    "updated_at": conv.updated_at,
-                    "character_id": conv.character_id,
-                }
-            )
+async def list_conversations(
+    offset: int = Query(0, ge=0, description="Number of sessions to skip"),
+    limit: Optional[int] = Query(None, ge=1, description="Maximum number of sessions to return"),
+):
+    """List therapy sessions, most recently updated first"""
+    conversation_ids, total = await asyncio.gather(
+        get_all_conversation_ids(offset, limit), count_conversations()
+    )
+    summaries = await get_conversation_summaries(conversation_ids)
+
+    conversation_list = [
+        {
+            "id": conv["id"],
+            "title": conv["title"],
+            "message_count": conv["message_count"],
+            "created_at": conv["created_at"],
+            "updated_at": conv["updated_at"],
+            "character_id": conv["character_id"],
+        }
+        for conv in summaries
+    ]
 
-    conversation_list.sort(key=lambda x: x["updated_at"], reverse=True)
-    return {"conversations": conversation_list, "total": len(conversation_list)}
+    return ORJSONResponse(
+        {"conversations": conversation_list, "total": total}
+    )
 
 
 @router.get("/conversations/{conversation_id}")
 async def get_conversation_details(conversation_id: str):
     """Get detailed information about a specific therapy session"""
-    conversation = await get_conversation(conversation_id)
-    if not conversation:
+    raw = await get_conversation_raw(conversation_id)
+    if not raw:
         raise HTTPException(status_code=404, detail="Conversation not found")
 
-    return {
-        "id": conversation.id,
-        "title": conversation.title,
-        "messages": [msg.model_dump() for msg in conversation.messages],
-        "created_at": conversation.created_at,
-        "updated_at": conversation.updated_at,
-        "character_id": conversation.character_id,
-    }
+    # Messages are spliced in as stored, so none of them is decoded or re-encoded
+    conversation, messages = raw
+    return ORJSONResponse(
+        {
+            "id": conversation["id"],
+            "title": conversation["title"],
+            "messages": orjson.Fragment("[" + ",".join(messages) + "]"),
+            "created_at": conversation["created_at"],
+            "updated_at": conversation["updated_at"],
+            "character_id": conversation["character_id"],
+        }
+    )
 
 
 @router.delete("/conversations/{conversation_id}")
 async def delete_conversation_endpoint(conversation_id: str):
     """Delete a therapy session"""
-    conversation = await get_conversation(conversation_id)
-    if not conversation:
+    # Deleting reports whether anything was there, so no existence check is needed first
+    if not await delete_conversation(conversation_id):
         raise HTTPException(status_code=404, detail="Conversation not found")
 
-    success = await delete_conversation(conversation_id)
-    if not success:
-        raise HTTPException(status_code=500, detail="Failed to delete conversation")
-    
     return {"message": "Therapy session deleted successfully"}
 
 
-@router.post("/conversations/{conversation_id}/messages", response_model=ChatResponse)
+@router.post("/conversations/{conversation_id}/messages", responses={200: {"model": ChatResponse}})
 async def add_message_to_conversation(conversation_id: str, request: ChatRequest):
     """Add a message to an existing therapy session"""
-    conversation = await get_conversation(conversation_id)
-    if not conversation:
-        raise HTTPException(status_code=404, detail="Conversation not found")
-
-    character_context = await get_character_context_from_redis(request.character_id)
+    character_context, conversation = await _load_turn(
+        request.character_id, conversation_id, conversation_first=True
+    )
 
-    user_message = Message(role=MessageRole.USER, content=request.message)
+    user_message = Message.model_construct(role=MessageRole.USER, content=request.message)
     conversation.messages.append(user_message)
 
     character_response = await generate_character_response(
         messages=conversation.messages, 
         character_context=character_context,
-        current_emotional_state=conversation.emotional_state
+        current_emotional_state=conversation.emotional_state,
+        character_id=request.character_id,
     )
 
-    assistant_message = Message(
-        role=MessageRole.ASSISTANT, content=character_response.comment
-    )
-    conversation.messages.append(assistant_message)
-
-    new_emotional_state = conversation.emotional_state + character_response.emotional_change
-    conversation.emotional_state = max(0, min(100, new_emotional_state))
-
-    conversation.updated_at = datetime.now(UTC)
-    await save_conversation(conversation)
-
-    session_ended = conversation.emotional_state <= 0 or conversation.emotional_state >= 100
-
-    return ChatResponse(
-        conversation_id=conversation.id,
-        message_id=assistant_message.id,
-        response=character_response.comment,
-        timestamp=assistant_message.timestamp,
-        emotional_change=character_response.emotional_change,
-        emotional_state=conversation.emotional_state,
-        session_ended=session_ended,
-    )
+    return ORJSONResponse(await _complete_turn(conversation, request.message, character_response))
 
 
 @router.delete("/cleanup")
 async def cleanup_all_data():
     """Delete all data from Redis (for testing purposes)"""
     try:
+        from app.core.llm import invalidate_character
         from app.core.redis_client import redis_client
 
-        all_keys = await redis_client.redis_client.keys("*")
-        
-        if all_keys:
-            deleted_count = await redis_client.redis_client.delete(*all_keys)
+        # SCAN in batches and UNLINK so Redis frees memory off its main thread
+        deleted_count = 0
+        batch = []
+        async for key in redis_client.redis_client.scan_iter(count=500):
+            batch.append(key)
+            if len(batch) >= 500:
+                deleted_count += await redis_client.redis_client.unlink(*batch)
+                batch = []
+        if batch:
+            deleted_count += await redis_client.redis_client.unlink(*batch)
+        invalidate_character()
+
+        if deleted_count:
             return {
                 "message": f"Cleaned up {deleted_count} items from Redis",
                 "deleted_count": deleted_count
@@ -271,11 +353,55 @@ async def generate_characters(request: CharacterGenerationRequest):
     """Generate characters with auto-generated UUIDs"""
     try:
         from app.core.llm import generate_characters_from_theme
-        response = await generate_characters_from_theme(request.theme, request.num_characters)
+        response = await generate_characters_from_theme(
+            request.theme, request.num_characters, force_refresh=request.force_refresh
+        )
+        payload = response.model_dump(mode="json")
         return {
-            "theme": response.theme,
-            "characters": [char.model_dump() for char in response.characters],
-            "total": len(response.characters)
+            "theme": payload["theme"],
+            "characters": payload["characters"],
+            "total": len(payload["characters"])
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Character generation failed: {str(e)}")
+
+
+async def _run_streamed_generation(theme: str, num_characters: int, events: asyncio.Queue):
+    """Generate characters with a streamed response, forwarding deltas to the event queue"""
+    from app.core.llm import stream_characters_from_theme, finish_character_generation
+
+    try:
+        chunks = []
+        async for delta in stream_characters_from_theme(theme, num_characters):
+            chunks.append(delta)
+            events.put_nowait(sse_event("delta", delta))
+
+        response = await finish_character_generation(theme, "".join(chunks))
+        payload = response.model_dump(mode="json")
+        events.put_nowait(
+            sse_event(
+                "final",
+                {
+                    "theme": payload["theme"],
+                    "characters": payload["characters"],
+                    "total": len(payload["characters"]),
+                },
+            )
+        )
+    except Exception as e:
+        events.put_nowait(sse_event("error", {"detail": f"Character generation failed: {str(e)}"}))
+
+
+@router.post("/characters/generate/stream")
+async def stream_generate_characters(request: CharacterGenerationRequest):
+    """
+    Generate characters, streaming the LLM output as it is produced.
+
+    Responds with server-sent events: one "delta" event per chunk of the raw
+    JSON response, then a "final" event carrying the same payload as
+    POST /characters/generate. Generation runs in a background task, so the
+    characters are saved even if the client disconnects early.
+    """
+    return stream_in_background(
+        lambda events: _run_streamed_generation(request.theme, request.num_characters, events)
+    )
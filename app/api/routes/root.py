@@ -1,41 +1,69 @@
+import asyncio
 import os
-import aiofiles
 from datetime import UTC, datetime
-from typing import Optional
+from typing import List, Optional, Tuple
 
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
 
+from app.api.sse import sse_event, stream_in_background
+from app.core.config import settings
 from app.core.speech_to_text import transcribe_audio
 from app.core.text_to_speech import TTSRequest, generate_tts
 from app.core.llm import (
     MessageRole,
     Message,
     CharacterContext,
+    CharacterResponse,
     get_conversation,
     save_conversation,
     generate_character_response,
+    stream_character_response,
+    parse_character_response,
     get_character,
+    get_character_context,
     Conversation,
 )
 
 router = APIRouter()
 
-
 async def get_character_context_from_redis(character_id: str) -> CharacterContext:
     """Get character context from Redis using UUID"""
-    character_data = await get_character(character_id)
-    if not character_data:
+    character_context = await get_character_context(character_id)
+    if not character_context:
         raise HTTPException(status_code=404, detail="Character not found")
-    
-    return CharacterContext(
-        name=character_data["name"],
-        gender=character_data["gender"],
-        mental_state=character_data["mental_state"],
-        problem=character_data["problem"],
-        background=character_data["background"],
-        interaction_warning=character_data["interaction_warning"],
-    )
+    return character_context
+
+
+# Stable instructions come first and the character details last, so the shared
+# prefix is eligible for the LLM provider's automatic prompt caching
+_INITIAL_PROMPT = """You are a person talking to a friend for emotional support. Your identity is given under CHARACTER CONTEXT at the end.
+
+CONVERSATION STYLE:
+- Speak naturally like a real person, not a formal therapy client
+- Use casual, conversational language with contractions (I'm, you're, don't, etc.)
+- Express emotions authentically - be vulnerable, honest, and human
+- Use personal pronouns and speak from your own experience
+- Avoid overly formal or clinical language
+- Show personality and character quirks
+- Be specific about your feelings and experiences
+
+TASK: Write a brief opening statement (1-2 sentences) explaining what's on your mind and why you need to talk. Be honest about your current struggles and emotional state. Speak naturally like you're talking to a close friend, not seeking professional help.
+
+CHARACTER CONTEXT:
+- You are {name}
+- Mental State: {mental_state}
+- Problem: {problem}
+- Background: {background}"""
+
+
+def check_audio_size(file_path: str):
+    """Reject audio files too large to transcribe before reading any of them"""
+    if os.path.getsize(file_path) > settings.STT_MAX_AUDIO_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Audio file exceeds {settings.STT_MAX_AUDIO_BYTES} bytes",
+        )
 
 
 @router.get("/", response_model=str)
@@ -68,6 +96,26 @@ class ZombieInteractionResponse(BaseModel):
     session_ended: bool = Field(False, description="Whether the therapy session should end")
 
 
+class ZombieBatchRequest(BaseModel):
+    """Request model for several zombie interactions handled concurrently"""
+    items: List[ZombieInteractionRequest] = Field(
+        ..., min_length=1, max_length=20, description="Interactions, each with a distinct character"
+    )
+
+
+class ZombieBatchItemResult(BaseModel):
+    """Outcome of one interaction in a batch: its response, or the error that stopped it"""
+    character_id: str
+    status_code: int = Field(200, description="HTTP status the interaction would have returned on its own")
+    response: Optional[ZombieInteractionResponse] = None
+    error: Optional[str] = None
+
+
+class ZombieBatchResponse(BaseModel):
+    """Response model for a batch of zombie interactions, in request order"""
+    results: List[ZombieBatchItemResult]
+
+
 @router.post("/stt", response_model=str)
 async def stt(request: AudioFileRequest):
     """
@@ -78,13 +126,11 @@ async def stt(request: AudioFileRequest):
     if not os.path.exists(file_path):
         raise HTTPException(status_code=404, detail=f"File not found: {file_path}")
 
+    check_audio_size(file_path)
     filename = os.path.basename(file_path)
 
     try:
-        async with aiofiles.open(file_path, "rb") as f:
-            bytes_audio = await f.read()
-
-        transcription = await transcribe_audio(bytes_audio, filename)
+        transcription = await transcribe_audio(file_path, filename)
         return transcription
     except HTTPException:
         raise
@@ -106,16 +152,7 @@ async def tts(request: TTSRequest):
         if not character_data:
             raise HTTPException(status_code=404, detail="Character not found")
         
-        voice_selection = character_data.get("voice_selection", "alloy")
-        
-        enhanced_request = TTSRequest(
-            text=request.text,
-            stored_file_path=request.stored_file_path,
-            character_id=request.character_id,
-            voice=voice_selection
-        )
-        
-        await generate_tts(enhanced_request)
+        await generate_tts(request, character=character_data)
         return None
     except HTTPException:
         raise
@@ -125,117 +162,117 @@ async def tts(request: TTSRequest):
         raise HTTPException(status_code=500, detail=f"TTS generation failed: {str(e)}")
 
 
-@router.post("/zombie", response_model=ZombieInteractionResponse)
-async def zombie_interaction(request: ZombieInteractionRequest):
-    """
-    Endpoint for zombie interaction that handles both initial messages and audio responses.
-    
-    Flow:
-    1. If audio_file_path provided: Transcribe audio and get response
-    2. If no audio_file_path: Get initial message from zombie
-    3. Get character context from Redis
-    4. Get or create conversation using character_id as conversation_id
-    5. Generate character response based on input
-    6. Update emotional state and return response
-    """
-    # Step 1: Get character context
+async def load_character_context(character_id: str) -> CharacterContext:
+    """Get character context, reporting unexpected failures as a 500"""
     try:
-        character_context = await get_character_context_from_redis(request.character_id)
+        return await get_character_context_from_redis(character_id)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting character context: {str(e)}")
-    
-    # Step 2: Get or create conversation using character_id as conversation_id
+
+
+async def load_zombie_conversation(character_id: str) -> Conversation:
+    """Get or create the conversation keyed by character_id"""
     try:
-        conversation = await get_conversation(request.character_id)
+        conversation = await get_conversation(character_id)
         if not conversation:
-            # Create new conversation with character_id as the conversation_id
-            conversation = Conversation(id=request.character_id, character_id=request.character_id)
-            await save_conversation(conversation)
+            # Create new conversation with character_id as the conversation_id;
+            # it is persisted once the character has responded
+            conversation = Conversation(id=character_id, character_id=character_id)
+        return conversation
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error handling conversation: {str(e)}")
-    
-    # Step 3: Handle audio transcription or initial message
+
+
+async def transcribe_audio_file(file_path: str) -> str:
+    """Check and transcribe an audio file, decoding it straight from disk"""
+    if not os.path.exists(file_path):
+        raise HTTPException(status_code=404, detail=f"Audio file not found: {file_path}")
+    check_audio_size(file_path)
+
+    try:
+        transcription = await transcribe_audio(file_path, os.path.basename(file_path))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error transcribing audio: {str(e)}")
+
+    if not transcription.strip():
+        raise HTTPException(status_code=400, detail="No speech detected in audio file")
+    return transcription
+
+
+async def prepare_zombie_turn(
+    request: ZombieInteractionRequest,
+) -> Tuple[CharacterContext, Conversation, str]:
+    """Load the character and conversation and add this turn's input, returning the transcription"""
+    # Step 1: Start transcribing while the character context and conversation are fetched
+    transcription_task = None
     if request.audio_file_path:
-        # Process audio file
-        file_path = request.audio_file_path
-        
-        if not os.path.exists(file_path):
-            raise HTTPException(status_code=404, detail=f"Audio file not found: {file_path}")
-        
-        filename = os.path.basename(file_path)
-        
-        try:
-            async with aiofiles.open(file_path, "rb") as f:
-                bytes_audio = await f.read()
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error reading audio file: {str(e)}")
-        
-        # Transcribe audio
-        try:
-            transcription = await transcribe_audio(bytes_audio, filename)
-            if not transcription.strip():
-                raise HTTPException(status_code=400, detail="No speech detected in audio file")
-        except HTTPException:
-            raise
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error transcribing audio: {str(e)}")
-        
+        transcription_task = asyncio.create_task(transcribe_audio_file(request.audio_file_path))
+
+    # Step 2: Fetch the character context and conversation; errors are raised in
+    # that order, and before the audio file's, as when the steps ran one by one
+    loaded = await asyncio.gather(
+        load_character_context(request.character_id),
+        load_zombie_conversation(request.character_id),
+        return_exceptions=True,
+    )
+    for result in loaded:
+        if isinstance(result, BaseException):
+            if transcription_task:
+                transcription_task.cancel()
+                # Retrieve the outcome so a transcription that already failed is not reported
+                transcription_task.add_done_callback(lambda task: task.cancelled() or task.exception())
+            raise result
+    character_context, conversation = loaded
+
+    # Step 3: Handle audio transcription or initial message
+    if transcription_task:
+        transcription = await transcription_task
+
         # Add transcribed message to conversation
-        user_message = Message(role=MessageRole.USER, content=transcription)
+        user_message = Message.model_construct(role=MessageRole.USER, content=transcription)
         conversation.messages.append(user_message)
         
     else:
         # Generate initial message (no user input)
         transcription = ""  # No transcription for initial message
-        initial_prompt = f"""You are {character_context.name} talking to a friend for emotional support.
-
-CHARACTER CONTEXT:
-- Mental State: {character_context.mental_state}
-- Problem: {character_context.problem}
-- Background: {character_context.background}
-
-CONVERSATION STYLE:
-- Speak naturally like a real person, not a formal therapy client
-- Use casual, conversational language with contractions (I'm, you're, don't, etc.)
-- Express emotions authentically - be vulnerable, honest, and human
-- Use personal pronouns and speak from your own experience
-- Avoid overly formal or clinical language
-- Show personality and character quirks
-- Be specific about your feelings and experiences
-
-TASK: Write a brief opening statement (1-2 sentences) explaining what's on your mind and why you need to talk. Be honest about your current struggles and emotional state. Speak naturally like you're talking to a close friend, not seeking professional help."""
+        initial_prompt = _INITIAL_PROMPT.format(
+            name=character_context.name,
+            mental_state=character_context.mental_state,
+            problem=character_context.problem,
+            background=character_context.background,
+        )
         
         # Add system message to conversation for context
-        system_message = Message(role=MessageRole.SYSTEM, content=initial_prompt)
+        system_message = Message.model_construct(role=MessageRole.SYSTEM, content=initial_prompt)
         conversation.messages.append(system_message)
-    
-    # Step 4: Generate character response
-    try:
-        character_response = await generate_character_response(
-            messages=conversation.messages,
-            character_context=character_context,
-            current_emotional_state=conversation.emotional_state
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error generating character response: {str(e)}")
-    
+
+    return character_context, conversation, transcription
+
+
+async def complete_zombie_turn(
+    request: ZombieInteractionRequest,
+    conversation: Conversation,
+    transcription: str,
+    character_response: CharacterResponse,
+) -> ZombieInteractionResponse:
+    """Record the character's response on the conversation, save it and build the response"""
     # Step 5: Add character response to conversation and update emotional state
-    assistant_message = Message(
-        role=MessageRole.ASSISTANT, content=character_response.comment
+    now = datetime.now(UTC)
+    assistant_message = Message.model_construct(
+        role=MessageRole.ASSISTANT, content=character_response.comment, timestamp=now
     )
     conversation.messages.append(assistant_message)
     
-    new_emotional_state = conversation.emotional_state + character_response.emotional_change
-    conversation.emotional_state = max(0, min(100, new_emotional_state))
+    conversation.apply_emotional_change(character_response.emotional_change)
     
-    conversation.updated_at = datetime.now(UTC)
+    conversation.updated_at = now
     if not conversation.title:
         if request.audio_file_path:
             conversation.title = f"Zombie Therapy: {transcription[:30]}..."
         else:
-            conversation.title = f"Zombie Therapy: Initial Session"
+            conversation.title = "Zombie Therapy: Initial Session"
     
     # Step 6: Save conversation
     try:
@@ -244,7 +281,7 @@ TASK: Write a brief opening statement (1-2 sentences) explaining what's on your
         raise HTTPException(status_code=500, detail=f"Error saving conversation: {str(e)}")
     
     # Step 7: Check if session should end
-    session_ended = conversation.emotional_state <= 0 or conversation.emotional_state >= 100
+    session_ended = conversation.session_ended
     
     return ZombieInteractionResponse(
         transcription=transcription,
@@ -253,3 +290,110 @@ TASK: Write a brief opening statement (1-2 sentences) explaining what's on your
         emotional_state=conversation.emotional_state,
         session_ended=session_ended,
     )
+
+
+@router.post("/zombie", response_model=ZombieInteractionResponse)
+async def zombie_interaction(request: ZombieInteractionRequest):
+    """
+    Endpoint for zombie interaction that handles both initial messages and audio responses.
+    
+    Flow:
+    1. If audio_file_path provided: Transcribe audio and get response
+    2. If no audio_file_path: Get initial message from zombie
+    3. Get character context from Redis
+    4. Get or create conversation using character_id as conversation_id
+    5. Generate character response based on input
+    6. Update emotional state and return response
+    """
+    character_context, conversation, transcription = await prepare_zombie_turn(request)
+
+    # Step 4: Generate character response
+    try:
+        character_response = await generate_character_response(
+            messages=conversation.messages,
+            character_context=character_context,
+            current_emotional_state=conversation.emotional_state,
+            character_id=request.character_id,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating character response: {str(e)}")
+
+    return await complete_zombie_turn(request, conversation, transcription, character_response)
+
+
+async def _run_streamed_zombie_turn(
+    request: ZombieInteractionRequest,
+    character_context: CharacterContext,
+    conversation: Conversation,
+    transcription: str,
+    events: asyncio.Queue,
+):
+    """Report the transcription, then generate a streamed character response, forwarding deltas to the event queue"""
+    events.put_nowait(sse_event("transcription", {"transcription": transcription}))
+    try:
+        chunks = []
+        async for delta in stream_character_response(
+            messages=conversation.messages,
+            character_context=character_context,
+            current_emotional_state=conversation.emotional_state,
+        ):
+            chunks.append(delta)
+            events.put_nowait(sse_event("delta", delta))
+
+        character_response = parse_character_response("".join(chunks))
+        response = await complete_zombie_turn(request, conversation, transcription, character_response)
+        events.put_nowait(sse_event("final", response.model_dump()))
+    except HTTPException as e:
+        events.put_nowait(sse_event("error", {"detail": e.detail}))
+    except Exception as e:
+        events.put_nowait(sse_event("error", {"detail": str(e)}))
+
+
+@router.post("/zombie/stream")
+async def zombie_stream_interaction(request: ZombieInteractionRequest):
+    """
+    Zombie interaction that streams its progress as server-sent events.
+
+    Emits a "transcription" event as soon as the audio is transcribed, one
+    "delta" event per chunk of the raw JSON response as the LLM generates it,
+    then a "final" event carrying the same payload as POST /zombie. The turn
+    is generated and saved in a background task, so it is recorded even if
+    the client disconnects early.
+    """
+    character_context, conversation, transcription = await prepare_zombie_turn(request)
+
+    return stream_in_background(
+        lambda events: _run_streamed_zombie_turn(
+            request, character_context, conversation, transcription, events
+        )
+    )
+
+
+async def _run_batch_item(item: ZombieInteractionRequest) -> ZombieBatchItemResult:
+    """Run one interaction of a batch, reporting its failure inline"""
+    try:
+        response = await zombie_interaction(item)
+    except HTTPException as e:
+        return ZombieBatchItemResult(character_id=item.character_id, status_code=e.status_code, error=e.detail)
+    except Exception as e:
+        return ZombieBatchItemResult(character_id=item.character_id, status_code=500, error=str(e))
+    return ZombieBatchItemResult(character_id=item.character_id, response=response)
+
+
+@router.post("/zombie/batch", response_model=ZombieBatchResponse)
+async def zombie_batch_interaction(request: ZombieBatchRequest):
+    """
+    Run several zombie interactions concurrently, one per character.
+
+    Each item behaves like a POST /zombie request. Their transcription, Redis
+    and LLM work overlaps, so a scene with several zombies takes about as long
+    as its slowest interaction. A failing item is reported in its result
+    without affecting the others.
+    """
+    character_ids = [item.character_id for item in request.items]
+    if len(set(character_ids)) != len(character_ids):
+        # Items for one character would race to update the same conversation
+        raise HTTPException(status_code=400, detail="Each character may appear only once per batch")
+
+    results = await asyncio.gather(*(_run_batch_item(item) for item in request.items))
+    return ZombieBatchResponse(results=results)
@@ -0,0 +1,42 @@
+import asyncio
+from typing import Any, Awaitable, Callable
+
+import orjson
+from fastapi.responses import StreamingResponse
+
+# Streams outlive their request; hold references so their tasks are not collected
+_background_tasks: set[asyncio.Task] = set()
+
+
+def sse_event(event: str, data: Any) -> bytes:
+    """Encode a server-sent event with a JSON payload"""
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+
+def stream_in_background(
+    coro_factory: Callable[[asyncio.Queue], Awaitable[None]],
+) -> StreamingResponse:
+    """
+    Run a producer in a background task and stream the events it queues.
+
+    coro_factory is called with an asyncio.Queue and returns the coroutine
+    that puts encoded events on it. The task is not tied to the request, so
+    its work completes even if the client disconnects early.
+    """
+    events: asyncio.Queue = asyncio.Queue()
+
+    async def produce():
+        try:
+            await coro_factory(events)
+        finally:
+            events.put_nowait(None)
+
+    task = asyncio.create_task(produce())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+    async def event_stream():
+        while (event := await events.get()) is not None:
+            yield event
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
@@ -1,4 +1,5 @@
 import os
+from functools import lru_cache
 from typing import Literal
 
 from pydantic import (
@@ -7,6 +8,7 @@ from pydantic import (
 )
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+import httpx
 from openai import AsyncOpenAI
 import redis.asyncio as redis
 
@@ -22,6 +24,7 @@ class Settings(BaseSettings):
         extra="ignore",
     )
     ENVIRONMENT: Literal["local", "production"] = "local"
+    LOG_LEVEL: Literal["DEBUG", "INFO", "WARNING", "ERROR"] = "INFO"
 
     FRONTEND_HOST: str = "http://localhost:3000"
 
@@ -32,6 +35,11 @@ class Settings(BaseSettings):
     REDIS_USERNAME: str = "default"
     REDIS_PASSWORD: str = os.getenv("REDIS_PASSWORD", "")
     REDIS_DECODE_RESPONSES: bool = True
+    REDIS_MAX_CONNECTIONS: int = 64
+    REDIS_POOL_TIMEOUT: float = 5.0
+    # Convert conversations still in the old single-key layout on startup; off by
+    # default since it scans the whole keyspace, and they are converted on first use anyway
+    MIGRATE_LEGACY_CONVERSATIONS_ON_STARTUP: bool = False
 
     @computed_field
     @property
@@ -43,17 +51,75 @@ class Settings(BaseSettings):
     LLM_MODEL_CHAT: str = "gpt-4o"
     LLM_MODEL_CHARACTER_GENERATION: str = "gpt-4o"
 
+    LLM_HTTP2: bool = True
+    LLM_MAX_CONNECTIONS: int = 500
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 200
+    LLM_KEEPALIVE_EXPIRY: float = 30.0
 
-llm_client: AsyncOpenAI = AsyncOpenAI(
-    api_key=os.getenv("OPENAI_API_KEY", ""),
-)
+    STT_MAX_AUDIO_BYTES: int = 25 * 1024 * 1024
+    # Greedy decoding with silence skipped; utterances are short, so wider beams gain little
+    STT_BEAM_SIZE: int = 1
+    STT_VAD_FILTER: bool = True
+    STT_VAD_MIN_SILENCE_MS: int = 500
+    # Threads per transcription (0 lets CTranslate2 choose) and transcriptions run in parallel
+    STT_CPU_THREADS: int = 0
+    STT_NUM_WORKERS: int = 2
+    STT_WARMUP: bool = True
 
-settings = Settings()
+    CHARACTER_CACHE_SIZE: int = 1024
+    CHARACTER_CACHE_TTL: int = 300
 
-redis_client = redis.Redis(
-    host=settings.REDIS_HOST,
-    port=settings.REDIS_PORT,
-    username=settings.REDIS_USERNAME,
-    password=settings.REDIS_PASSWORD,
-    decode_responses=settings.REDIS_DECODE_RESPONSES,
-)
+    # Reuse character responses for repeated therapist messages; off by default
+    # since a cached reply ignores the rest of the conversation history
+    RESPONSE_CACHE_ENABLED: bool = False
+    RESPONSE_CACHE_TTL: int = 3600
+    RESPONSE_CACHE_BUCKET_SIZE: int = 10
+
+    # Serve repeat generations for a theme from one stored sample; off by
+    # default since every request for a theme then gets the same characters
+    CHARACTER_GENERATION_CACHE_ENABLED: bool = False
+    CHARACTER_GENERATION_CACHE_SIZE: int = 256
+    CHARACTER_GENERATION_CACHE_TTL: int = 3600
+
+
+@lru_cache
+def get_settings() -> Settings:
+    """Get the application settings, parsed from the environment on first use"""
+    return Settings()
+
+
+settings = get_settings()
+
+
+@lru_cache
+def get_llm_client() -> AsyncOpenAI:
+    """Get the shared OpenAI client, built on first use"""
+    return AsyncOpenAI(
+        api_key=os.getenv("OPENAI_API_KEY", ""),
+        http_client=httpx.AsyncClient(
+            http2=settings.LLM_HTTP2,
+            limits=httpx.Limits(
+                max_connections=settings.LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(connect=5.0, read=60.0, write=10.0, pool=5.0),
+        ),
+    )
+
+
+@lru_cache
+def get_redis_client() -> redis.Redis:
+    """Get the shared Redis client, built on first use"""
+    # Bounded so a burst of requests waits for a free connection instead of
+    # opening more than the Redis server allows
+    pool = redis.BlockingConnectionPool(
+        host=settings.REDIS_HOST,
+        port=settings.REDIS_PORT,
+        username=settings.REDIS_USERNAME,
+        password=settings.REDIS_PASSWORD,
+        decode_responses=settings.REDIS_DECODE_RESPONSES,
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        timeout=settings.REDIS_POOL_TIMEOUT,
+    )
+    return redis.Redis(connection_pool=pool)
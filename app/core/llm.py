@@ -1,12 +1,20 @@
+import asyncio
 import json
+import logging
 import uuid
 import time
+import weakref
+from functools import lru_cache
 from datetime import UTC, datetime
-from typing import List, Dict, Optional, Any
+from typing import AsyncIterator, List, Dict, Optional, Any, Tuple
 from enum import Enum
-from pydantic import BaseModel, ConfigDict, Field
-from app.core.config import llm_client, settings
+from cachetools import TTLCache
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, ValidationError
+from app.core.config import get_llm_client, settings
 from app.core.redis_client import redis_client
+from app.core.response_cache import response_cache
+
+logger = logging.getLogger(__name__)
 
 
 class TTSVoice(str, Enum):
@@ -66,9 +74,13 @@ class Gender(str, Enum):
     FEMALE = "female"
 
 
-class Character(BaseModel):
+class _StrictModel(BaseModel):
+    """Base for models used as strict OpenAI response schemas, which must not allow extra fields"""
+
     model_config = ConfigDict(extra="forbid")
 
+
+class Character(_StrictModel):
     name: str = Field(..., description="Character's full name (first and last name)")
     background: str = Field(
         ...,
@@ -109,29 +121,11 @@ class CharacterWithId(Character):
     
     @classmethod
     def from_character(cls, character: Character, character_id: str) -> "CharacterWithId":
-        """Create CharacterWithId from Character with UUID"""
-        return cls(
-            id=character_id,
-            name=character.name,
-            background=character.background,
-            body_type=character.body_type,
-            head_material=character.head_material,
-            body_material=character.body_material,
-            leg_material=character.leg_material,
-            feet_material=character.feet_material,
-            problem=character.problem,
-            problem_description=character.problem_description,
-            mental_state=character.mental_state,
-            interaction_warning=character.interaction_warning,
-            voice_instructions=character.voice_instructions,
-            voice_selection=character.voice_selection,
-            gender=character.gender,
-        )
-
+        """Create CharacterWithId from an already validated Character with UUID"""
+        return cls.model_construct(**{**dict(character), "id": character_id})
 
-class CharacterGenerationResponse(BaseModel):
-    model_config = ConfigDict(extra="forbid")
 
+class CharacterGenerationResponse(_StrictModel):
     theme: str = Field(
         ...,
         description="The main theme or setting that was used to generate the characters",
@@ -153,16 +147,26 @@ class MessageRole(str, Enum):
 class Message(BaseModel):
     """Individual message in a conversation"""
 
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    model_config = ConfigDict(frozen=True, extra="forbid")
+
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex)
     role: MessageRole
     content: str
     timestamp: datetime = Field(default_factory=lambda: datetime.now(UTC))
 
+    _openai_message: Optional[Dict[str, str]] = PrivateAttr(default=None)
+
+    def to_openai_message(self) -> Dict[str, str]:
+        """Get the OpenAI chat format of this message, built once per instance"""
+        if self._openai_message is None:
+            self._openai_message = {"role": self.role.value, "content": self.content}
+        return self._openai_message
+
 
 class Conversation(BaseModel):
     """A conversation session with multiple messages"""
 
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex)
     title: Optional[str] = None
     messages: List[Message] = Field(default_factory=list)
     created_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
@@ -170,10 +174,25 @@ class Conversation(BaseModel):
     character_id: Optional[str] = None
     emotional_state: int = Field(default=50, ge=0, le=100, description="Current emotional state (0-100)")
 
+    # Number of leading messages already stored in Redis; later ones are appended on save
+    _persisted_count: int = PrivateAttr(default=0)
+
+    def apply_emotional_change(self, emotional_change: int):
+        """Shift the emotional state, clamped to 0-100"""
+        state = self.emotional_state + emotional_change
+        self.emotional_state = 0 if state < 0 else 100 if state > 100 else state
+
+    @property
+    def session_ended(self) -> bool:
+        """Whether the emotional state has hit either end of the scale"""
+        return not 0 < self.emotional_state < 100
+
 
 class CharacterContext(BaseModel):
     """Character context for therapy sessions"""
 
+    model_config = ConfigDict(frozen=True)
+
     name: str = Field(..., description="Character's name")
     gender: Gender = Field(..., description="Character's gender")
     mental_state: str = Field(..., description="Character's current mental state")
@@ -184,11 +203,9 @@ class CharacterContext(BaseModel):
     )
 
 
-class CharacterResponse(BaseModel):
+class CharacterResponse(_StrictModel):
     """Character's response to therapy with emotional state changes"""
 
-    model_config = ConfigDict(extra="forbid")
-
     emotional_change: int = Field(
         ..., ge=-50, le=50, description="Change in emotional state (-50 to +50)"
     )
@@ -203,26 +220,48 @@ class CharacterResponse(BaseModel):
     )
 
 
+_CHARACTER_RESPONSE_SCHEMA = CharacterResponse.model_json_schema(mode="validation")
+
+_CHARACTER_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "character_response",
+        "schema": _CHARACTER_RESPONSE_SCHEMA,
+        "strict": True,
+    },
+}
+
+
 async def get_conversation(conversation_id: str) -> Optional[Conversation]:
     """Get a conversation by ID from Redis"""
-    data = await redis_client.get_conversation(conversation_id)
-    if data:
-        for message in data.get("messages", []):
-            if "timestamp" in message:
-                message["timestamp"] = datetime.fromisoformat(message["timestamp"])
-        if "created_at" in data:
-            data["created_at"] = datetime.fromisoformat(data["created_at"])
-        if "updated_at" in data:
-            data["updated_at"] = datetime.fromisoformat(data["updated_at"])
-        return Conversation(**data)
+    raw = await redis_client.get_conversation_raw(conversation_id)
+    if raw:
+        data, messages = raw
+        data["messages"] = [Message.model_validate_json(message) for message in messages]
+        conversation = Conversation.model_validate(data)
+        conversation._persisted_count = len(messages)
+        return conversation
     return None
 
 
+async def get_conversation_raw(conversation_id: str) -> Optional[Tuple[Dict[str, Any], List[str]]]:
+    """Get a conversation's metadata and its messages as stored JSON, without building models"""
+    return await redis_client.get_conversation_raw(conversation_id)
+
+
 async def save_conversation(conversation: Conversation) -> bool:
-    """Save a conversation to Redis"""
-    conversation.updated_at = datetime.now(UTC)
-    conversation_data = conversation.model_dump()
-    return await redis_client.save_conversation(conversation.id, conversation_data)
+    """Save a conversation to Redis, appending only messages not yet stored; callers stamp updated_at"""
+    persisted_count = conversation._persisted_count
+    conversation_data = conversation.model_dump(exclude={"messages"})
+    conversation_data["messages"] = [
+        message.model_dump_json() for message in conversation.messages[persisted_count:]
+    ]
+    success = await redis_client.save_conversation(
+        conversation.id, conversation_data, append=persisted_count > 0
+    )
+    if success:
+        conversation._persisted_count = len(conversation.messages)
+    return success
 
 
 async def create_new_conversation(character_id: Optional[str] = None) -> Conversation:
@@ -237,9 +276,19 @@ async def delete_conversation(conversation_id: str) -> bool:
     return await redis_client.delete_conversation(conversation_id)
 
 
-async def get_all_conversation_ids() -> List[str]:
-    """Get all conversation IDs from Redis"""
-    return await redis_client.get_all_conversation_keys()
+async def get_all_conversation_ids(offset: int = 0, limit: Optional[int] = None) -> List[str]:
+    """Get conversation IDs from Redis, most recently updated first"""
+    return await redis_client.get_all_conversation_keys(offset, limit)
+
+
+async def count_conversations() -> int:
+    """Get the number of stored conversations"""
+    return await redis_client.count_conversations()
+
+
+async def get_conversation_summaries(conversation_ids: List[str]) -> List[Dict[str, Any]]:
+    """Get the metadata and message count of several conversations, in the order given"""
+    return await redis_client.get_conversation_summaries(conversation_ids)
 
 
 async def get_all_characters() -> List[Dict[str, Any]]:
@@ -247,57 +296,109 @@ async def get_all_characters() -> List[Dict[str, Any]]:
     return await redis_client.get_all_characters()
 
 
+# Characters are written once at generation time, so repeat lookups are served in-process
+_character_cache: TTLCache = TTLCache(
+    maxsize=settings.CHARACTER_CACHE_SIZE, ttl=settings.CHARACTER_CACHE_TTL
+)
+_character_locks: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+_character_context_cache: TTLCache = TTLCache(
+    maxsize=settings.CHARACTER_CACHE_SIZE, ttl=settings.CHARACTER_CACHE_TTL
+)
+
+
 async def get_character(character_id: str) -> Optional[Dict[str, Any]]:
-    """Get a character from Redis"""
-    return await redis_client.get_character(character_id)
+    """Get a character from the in-process cache, falling back to Redis"""
+    character_data = _character_cache.get(character_id)
+    if character_data is not None:
+        return character_data
+
+    # Concurrent misses for the same character share a single Redis read
+    lock = _character_locks.get(character_id)
+    if lock is None:
+        lock = _character_locks[character_id] = asyncio.Lock()
+    async with lock:
+        character_data = _character_cache.get(character_id)
+        if character_data is None:
+            character_data = await redis_client.get_character(character_id)
+            if character_data is not None:
+                _character_cache[character_id] = character_data
+    return character_data
+
+
+async def get_character_context(character_id: str) -> Optional[CharacterContext]:
+    """Get the chat context of a character, built once per cached character"""
+    character_context = _character_context_cache.get(character_id)
+    if character_context is not None:
+        return character_context
+
+    character_data = await get_character(character_id)
+    if character_data is None:
+        return None
+    character_context = CharacterContext(
+        name=character_data["name"],
+        gender=character_data["gender"],
+        mental_state=character_data["mental_state"],
+        problem=character_data["problem"],
+        background=character_data["background"],
+        interaction_warning=character_data["interaction_warning"],
+    )
+    _character_context_cache[character_id] = character_context
+    return character_context
+
+
+def invalidate_character(character_id: Optional[str] = None):
+    """Drop one character, or every character if no ID is given, from the in-process caches"""
+    if character_id is None:
+        _character_cache.clear()
+        _character_context_cache.clear()
+        _character_generation_cache.clear()
+    else:
+        _character_cache.pop(character_id, None)
+        _character_context_cache.pop(character_id, None)
+        for key, response in list(_character_generation_cache.items()):
+            if any(character.id == character_id for character in response.characters):
+                _character_generation_cache.pop(key, None)
 
 
 async def delete_character(character_id: str) -> bool:
     """Delete a character from Redis"""
-    return await redis_client.delete_character(character_id)
+    deleted = await redis_client.delete_character(character_id)
+    # Invalidated after the delete so a lookup during it cannot re-cache the character
+    invalidate_character(character_id)
+    return deleted
 
 
 async def save_character_generation_response(theme: str, response: CharacterGenerationResponse) -> bool:
     """Save a character generation response to Redis"""
     try:
+        generated_at = datetime.now(UTC).isoformat()
+        characters = {}
         for character in response.characters:
             character_data = character.model_dump()
             character_data['theme'] = theme
-            character_data['generated_at'] = datetime.now(UTC).isoformat()
-            
-            success = await redis_client.save_character(character.id, character_data)
-            if not success:
-                print(f"Failed to save character {character.name}")
-                return False
-        
-        return True
+            character_data['generated_at'] = generated_at
+            characters[character.id] = character_data
+
+        if not characters:
+            return True
+
+        success = await redis_client.save_characters(characters)
+        for character_id in characters:
+            invalidate_character(character_id)
+        if not success:
+            logger.error("Failed to save characters for theme %s", theme)
+        return success
     except Exception as e:
-        print(f"Error saving character generation response: {e}")
+        logger.error("Error saving character generation response: %s", e)
         return False
 
 
-async def generate_character_response(
-    messages: List[Message], character_context: CharacterContext, current_emotional_state: int = 50
-) -> CharacterResponse:
-    """Generate a character's response to therapy using Pydantic schema"""
-
-    schema = CharacterResponse.model_json_schema(mode="validation")
-    print(f"[DEBUG] Generated schema: {schema}")
-
-    system_message = {
-        "role": "system",
-        "content": f"""You are {character_context.name} who is talking to a friend for emotional support. 
-
-CHARACTER CONTEXT:
-- Mental State: {character_context.mental_state}
-- Problem: {character_context.problem}
-- Background: {character_context.background}
-- Interaction Warning: {character_context.interaction_warning}
-- Current Emotional State: {current_emotional_state}/100
+# Stable instructions come first and the per-character, per-turn details last, so
+# the shared prefix is eligible for the LLM provider's automatic prompt caching
+_CHARACTER_SYSTEM_PROMPT = """You are a person talking to a friend for emotional support. Your identity and current state are given under CHARACTER CONTEXT at the end.
 
 EMOTIONAL STATE SYSTEM:
 - Your emotional state ranges from 0 (completely enraged/hopeless) to 100 (completely satisfied/hopeful)
-- Current state: {current_emotional_state}/100
 - You should OPTIMISTICALLY move toward emotional improvement when possible
 - Respond to supportive, empathetic listening with positive emotional changes (+3 to +8)
 - Respond to dismissive or unhelpful responses with negative changes (-3 to -8)
@@ -345,38 +446,128 @@ RESPONSE VARIETY:
 - Never give identical responses to similar situations
 
 RESPONSE FORMAT:
-Return valid JSON with emotional_change (-50 to +50) and comment (1-2 sentences in natural, conversational language).""",
+Return valid JSON with emotional_change (-50 to +50) and comment (1-2 sentences in natural, conversational language).
+
+CHARACTER CONTEXT:
+- You are {name}
+- Mental State: {mental_state}
+- Problem: {problem}
+- Background: {background}
+- Interaction Warning: {interaction_warning}
+"""
+
+
+@lru_cache(maxsize=1024)
+def _character_system_prompt(character_context: CharacterContext) -> str:
+    """Render the system prompt for a character, up to its emotional state"""
+    return _CHARACTER_SYSTEM_PROMPT.format_map(character_context.__dict__)
+
+
+def _character_system_message(
+    character_context: CharacterContext, current_emotional_state: int
+) -> Dict[str, str]:
+    """Build the system message for a character at a given emotional state"""
+    # The emotional state changes nearly every turn, so it is appended rather than cached
+    return {
+        "role": "system",
+        "content": _character_system_prompt(character_context)
+        + f"- Current Emotional State: {current_emotional_state}/100",
     }
 
-    openai_messages = [system_message]
-    for msg in messages:
-        openai_messages.append({"role": msg.role.value, "content": msg.content})
+
+def _build_character_messages(
+    messages: List[Message], character_context: CharacterContext, current_emotional_state: int
+) -> List[Dict[str, str]]:
+    """Build the OpenAI message list for a character response"""
+    system_message = _character_system_message(character_context, current_emotional_state)
+    return [system_message, *(msg.to_openai_message() for msg in messages)]
+
+
+def parse_character_response(response_text: str) -> CharacterResponse:
+    """Parse the strict json_schema output of the LLM into a CharacterResponse"""
+    return CharacterResponse.model_validate_json(response_text)
+
+
+async def generate_character_response(
+    messages: List[Message],
+    character_context: CharacterContext,
+    current_emotional_state: int = 50,
+    character_id: Optional[str] = None,
+) -> CharacterResponse:
+    """
+    Generate a character's response to therapy using Pydantic schema.
+
+    When character_id is given and the response cache is enabled, a reply to
+    the same therapist message at a similar emotional state is reused instead
+    of calling the LLM.
+    """
+
+    cache_message = None
+    if character_id and settings.RESPONSE_CACHE_ENABLED and messages and messages[-1].role == MessageRole.USER:
+        cache_message = messages[-1].content
+        cached = await response_cache.get(character_id, current_emotional_state, cache_message)
+        if cached:
+            try:
+                return parse_character_response(cached)
+            except ValidationError as e:
+                # A corrupt entry or one from an older schema; regenerate and overwrite it
+                logger.warning("Dropping unreadable cached response: %s", e)
+                await response_cache.delete(character_id, current_emotional_state, cache_message)
+
+    openai_messages = _build_character_messages(messages, character_context, current_emotional_state)
 
     try:
-        response = await llm_client.chat.completions.create(
+        response = await get_llm_client().chat.completions.create(
             model=settings.LLM_MODEL_CHAT,
             messages=openai_messages,
             temperature=0.95,
             max_tokens=500,
-            response_format={
-                "type": "json_schema",
-                "json_schema": {
-                    "name": "character_response",
-                    "schema": schema,
-                    "strict": True,
-                },
-            },
+            response_format=_CHARACTER_RESPONSE_FORMAT,
         )
 
         response_text = response.choices[0].message.content.strip()
-        print(f"\n[DEBUG] Raw LLM response:\n{response_text}")
+        logger.debug("Raw LLM response:\n%s", response_text)
 
-        data = json.loads(response_text)
-        character_response = CharacterResponse(**data)
-        return character_response
+        character_response = parse_character_response(response_text)
 
     except Exception as e:
-        print(f"[DEBUG] Error: {e}")
+        logger.error("LLM error: %s", e)
+        raise Exception(f"LLM error: {str(e)}")
+
+    if cache_message is not None:
+        await response_cache.set(character_id, current_emotional_state, cache_message, response_text)
+
+    return character_response
+
+
+async def stream_character_response(
+    messages: List[Message], character_context: CharacterContext, current_emotional_state: int = 50
+) -> AsyncIterator[str]:
+    """
+    Stream a character's response to therapy as it is generated.
+
+    Yields the raw JSON text deltas of the response; join them and pass the
+    result to parse_character_response once the stream is exhausted.
+    """
+
+    openai_messages = _build_character_messages(messages, character_context, current_emotional_state)
+
+    try:
+        stream = await get_llm_client().chat.completions.create(
+            model=settings.LLM_MODEL_CHAT,
+            messages=openai_messages,
+            temperature=0.95,
+            max_tokens=500,
+            response_format=_CHARACTER_RESPONSE_FORMAT,
+            stream=True,
+        )
+
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    except Exception as e:
+        logger.error("LLM error: %s", e)
         raise Exception(f"LLM error: {str(e)}")
 
 
@@ -385,7 +576,7 @@ async def start_character_session(
 ) -> tuple[str, str]:
     """Start a new therapy session where the character speaks first"""
 
-    conversation = await create_new_conversation(character_id)
+    conversation = Conversation(character_id=character_id)
 
     initial_prompt = f"""You are {character_context.name} talking to a friend for emotional support.
 
@@ -409,7 +600,7 @@ TASK: Write a brief opening statement (1-2 sentences) explaining what's on your
 RESPONSE FORMAT: Just write the opening statement in natural, conversational language, no JSON needed."""
 
     try:
-        response = await llm_client.chat.completions.create(
+        response = await get_llm_client().chat.completions.create(
             model=settings.LLM_MODEL_CHAT,
             messages=[{"role": "system", "content": initial_prompt}],
             temperature=0.9,
@@ -419,30 +610,32 @@ RESPONSE FORMAT: Just write the opening statement in natural, conversational lan
     except Exception as e:
         raise Exception(f"Failed to generate initial message: {e}")
 
-    character_message = Message(role=MessageRole.ASSISTANT, content=initial_message)
+    character_message = Message.model_construct(role=MessageRole.ASSISTANT, content=initial_message)
     conversation.messages.append(character_message)
+    conversation.updated_at = character_message.timestamp
 
     await save_conversation(conversation)
 
     return conversation.id, initial_message
 
 
-async def generate_characters_from_theme(theme: str, num_characters: int) -> CharacterGenerationResponse:
-    """
-    Generate a list of characters based on a given theme.
-
-    Args:
-        theme (str): The main theme for character generation
-        num_characters (int): Number of characters to generate
-
-    Returns:
-        CharacterGenerationResponse: Generated characters with all attributes
-    """
-
-    response_schema = CharacterGenerationResponse.model_json_schema(mode="validation")
-    print(f"[DEBUG] Character generation schema: {response_schema}")
-
-    system_prompt = """You are an expert character designer and creative writer specializing in creating deeply nuanced, emotionally complex characters for interactive storytelling and game development. Your task is to generate diverse, compelling characters that feel authentic and relatable while fitting within specific thematic and mechanical constraints.
+_CHARACTER_GENERATION_SCHEMA = CharacterGenerationResponse.model_json_schema(mode="validation")
+# Compact: indentation only adds prompt tokens, the model does not need it
+_CHARACTER_GENERATION_SCHEMA_JSON = json.dumps(_CHARACTER_GENERATION_SCHEMA, separators=(",", ":"))
+# The enums never change, so the option lists offered to the LLM are joined once
+_CHARACTER_GENERATION_OPTIONS = "\n".join(
+    f"{label}: {', '.join(member.value for member in enum)}"
+    for label, enum in (
+        ("Body Types", BodyType),
+        ("Head Materials", HeadMaterial),
+        ("Body Materials", BodyMaterial),
+        ("Leg Materials", LegMaterial),
+        ("Feet Materials", FeetMaterial),
+        ("TTS Voices", TTSVoice),
+        ("Genders", Gender),
+    )
+)
+_CHARACTER_GENERATION_SYSTEM_PROMPT = """You are an expert character designer and creative writer specializing in creating deeply nuanced, emotionally complex characters for interactive storytelling and game development. Your task is to generate diverse, compelling characters that feel authentic and relatable while fitting within specific thematic and mechanical constraints.
 
 CHARACTER CREATION GUIDELINES:
 
@@ -510,17 +703,26 @@ CHARACTER CREATION GUIDELINES:
 
 Remember: These characters are designed for meaningful player interaction. Each should feel like a real person with genuine struggles, hopes, and personality. The goal is to create characters that players can empathize with and want to help, while respecting their boundaries and triggers. Make each character's story completely unique and specific."""
 
-    user_prompt = f"""Generate {num_characters} compelling characters for the theme: "{theme}"
+# Shared by every generation request; the OpenAI client only reads the message dicts
+_CHARACTER_GENERATION_SYSTEM_MESSAGE = {"role": "system", "content": _CHARACTER_GENERATION_SYSTEM_PROMPT}
+
+_CHARACTER_GENERATION_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "character_generation",
+        "schema": _CHARACTER_GENERATION_SCHEMA,
+        "strict": True,
+    },
+}
+
+
+def _character_generation_prompt(theme: str, num_characters: int) -> str:
+    """Build the user prompt asking for num_characters characters on a theme"""
+    return f"""Generate {num_characters} compelling characters for the theme: "{theme}"
 
 AVAILABLE OPTIONS (USE ONLY THESE EXACT VALUES):
 
-Body Types: {', '.join([body.value for body in BodyType])}
-Head Materials: {', '.join([head.value for head in HeadMaterial])}
-Body Materials: {', '.join([body.value for body in BodyMaterial])}
-Leg Materials: {', '.join([leg.value for leg in LegMaterial])}
-Feet Materials: {', '.join([feet.value for feet in FeetMaterial])}
-TTS Voices: {', '.join([voice.value for voice in TTSVoice])}
-Genders: {', '.join([gender.value for gender in Gender])}
+{_CHARACTER_GENERATION_OPTIONS}
 
 CHARACTER REQUIREMENTS:
 - Each character must have a unique name, background, and personality
@@ -539,48 +741,151 @@ Ensure all characters feel connected to the theme "{theme}" while maintaining in
 
 RESPONSE FORMAT:
 Return valid JSON that strictly follows this schema:
-{json.dumps(response_schema, indent=2)}
+{_CHARACTER_GENERATION_SCHEMA_JSON}
 
 IMPORTANT: Use ONLY the exact enum values provided above for body types, clothing, accessories, TTS voices, and genders. Mental states should be descriptive sentences/phrases. Voice instructions should be detailed and specific about tone, pace, and emotional inflections."""
 
-    start_time = time.time()
 
-    response = await llm_client.chat.completions.create(
-        model=settings.LLM_MODEL_CHARACTER_GENERATION,
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ],
-        temperature=0.9,
-        response_format={
-            "type": "json_schema",
-            "json_schema": {
-                "name": "character_generation",
-                "schema": response_schema,
-                "strict": True,
-            },
-        },
-    )
+def _character_generation_messages(theme: str, num_characters: int) -> List[Dict[str, str]]:
+    """Build the OpenAI message list for a character generation request"""
+    return [
+        _CHARACTER_GENERATION_SYSTEM_MESSAGE,
+        {"role": "user", "content": _character_generation_prompt(theme, num_characters)},
+    ]
 
-    end_time = time.time()
-    latency = end_time - start_time
-    print(f"Character generation latency: {latency:.2f} seconds")
 
-    result = json.loads(response.choices[0].message.content)
+async def finish_character_generation(theme: str, response_text: str) -> CharacterGenerationResponse:
+    """Parse generated characters, assign them IDs and save them to Redis"""
+    character_response = CharacterGenerationResponse.model_validate_json(response_text)
 
-    character_response = CharacterGenerationResponse(**result)
-    
-    characters_with_ids = []
-    for character in character_response.characters:
-        character_with_id = CharacterWithId.from_character(character, str(uuid.uuid4()))
-        characters_with_ids.append(character_with_id)
+    # Just validated from the LLM output, so the IDs are attached without revalidating
+    character_response.characters = [
+        CharacterWithId.from_character(character, str(uuid.uuid4()))
+        for character in character_response.characters
+    ]
 
-    character_response.characters = characters_with_ids
-    
     try:
         await save_character_generation_response(theme, character_response)
-        print(f"[DEBUG] Saved {len(character_response.characters)} characters to Redis")
+        logger.debug("Saved %d characters to Redis", len(character_response.characters))
     except Exception as e:
-        print(f"[DEBUG] Failed to save characters to Redis: {e}")
+        logger.error("Failed to save characters to Redis: %s", e)
+
+    return character_response
+
+
+# One generated sample per (theme, count), used when CHARACTER_GENERATION_CACHE_ENABLED is set
+_character_generation_cache: TTLCache = TTLCache(
+    maxsize=settings.CHARACTER_GENERATION_CACHE_SIZE, ttl=settings.CHARACTER_GENERATION_CACHE_TTL
+)
+_character_generation_locks: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+
+
+async def generate_characters_from_theme(
+    theme: str, num_characters: int, force_refresh: bool = False
+) -> CharacterGenerationResponse:
+    """
+    Generate a list of characters based on a given theme.
+
+    When the character generation cache is enabled, a theme generated
+    recently is served from the cache instead of calling the LLM again.
+
+    Args:
+        theme (str): The main theme for character generation
+        num_characters (int): Number of characters to generate
+        force_refresh (bool): Generate new characters even if the theme is cached
 
+    Returns:
+        CharacterGenerationResponse: Generated characters with all attributes
+    """
+    if not settings.CHARACTER_GENERATION_CACHE_ENABLED:
+        return await _generate_characters_from_theme(theme, num_characters)
+
+    key = (theme, num_characters)
+    if not force_refresh:
+        character_response = _character_generation_cache.get(key)
+        if character_response is not None:
+            return character_response
+
+    # Concurrent requests for the same theme share a single generation
+    lock = _character_generation_locks.get(key)
+    if lock is None:
+        lock = _character_generation_locks[key] = asyncio.Lock()
+    async with lock:
+        character_response = None if force_refresh else _character_generation_cache.get(key)
+        if character_response is None:
+            character_response = await _generate_characters_from_theme(theme, num_characters)
+            _character_generation_cache[key] = character_response
     return character_response
+
+
+async def _generate_characters_from_theme(theme: str, num_characters: int) -> CharacterGenerationResponse:
+    """Generate and save characters for a theme with a single LLM call"""
+    started = time.perf_counter()
+
+    response = await get_llm_client().chat.completions.create(
+        model=settings.LLM_MODEL_CHARACTER_GENERATION,
+        messages=_character_generation_messages(theme, num_characters),
+        temperature=0.9,
+        response_format=_CHARACTER_GENERATION_FORMAT,
+    )
+
+    latency = time.perf_counter() - started
+    logger.info("Character generation latency: %.3f seconds", latency)
+
+    return await finish_character_generation(theme, response.choices[0].message.content)
+
+
+async def stream_characters_from_theme(theme: str, num_characters: int) -> AsyncIterator[str]:
+    """
+    Stream the generation of characters for a theme as it is generated.
+
+    Yields the raw JSON text deltas of the response; join them and pass the
+    result to finish_character_generation once the stream is exhausted to
+    get the characters with their IDs, saved to Redis.
+    """
+
+    started = time.perf_counter()
+
+    stream = await get_llm_client().chat.completions.create(
+        model=settings.LLM_MODEL_CHARACTER_GENERATION,
+        messages=_character_generation_messages(theme, num_characters),
+        temperature=0.9,
+        response_format=_CHARACTER_GENERATION_FORMAT,
+        stream=True,
+    )
+
+    first_token = None
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            if first_token is None:
+                first_token = time.perf_counter() - started
+            yield chunk.choices[0].delta.content
+
+    logger.info(
+        "Character generation latency: %.3f seconds (first token after %.3f seconds)",
+        time.perf_counter() - started,
+        first_token or 0.0,
+    )
+
+
+async def generate_characters_for_themes(
+    themes: List[str], num_characters: int, max_concurrency: int = 4
+) -> List[CharacterGenerationResponse]:
+    """
+    Generate characters for several themes concurrently.
+
+    Args:
+        themes (List[str]): The themes to generate characters for
+        num_characters (int): Number of characters to generate per theme
+        max_concurrency (int): Most generation calls in flight at once, to stay within rate limits
+
+    Returns:
+        List[CharacterGenerationResponse]: One response per theme, in the order given
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def generate(theme: str) -> CharacterGenerationResponse:
+        async with semaphore:
+            return await generate_characters_from_theme(theme, num_characters)
+
+    return await asyncio.gather(*(generate(theme) for theme in themes))
@@ -1,61 +1,222 @@
-import json
-from typing import Optional, Dict, Any, List
-from app.core.config import redis_client as global_redis_client
+import logging
+import time
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple
+import orjson
+import redis.asyncio as redis
+from app.core.config import get_redis_client
+
+logger = logging.getLogger(__name__)
 
 
 class RedisClient:
     """Redis client for conversation and character storage"""
     
     def __init__(self):
-        self.redis_client = global_redis_client
         self.conversation_prefix = "conversation:"
+        self.conversation_messages_suffix = ":messages"
+        self.conversation_index_key = "conversations:index"
         self.character_prefix = "character:"
         self.character_list_key = "characters:list"
     
+    @property
+    def redis_client(self) -> redis.Redis:
+        """The shared Redis connection, created on first use"""
+        return get_redis_client()
+
     def _get_conversation_key(self, conversation_id: str) -> str:
-        """Get Redis key for a conversation"""
+        """Get Redis key for a conversation's metadata hash"""
         return f"{self.conversation_prefix}{conversation_id}"
+
+    def _get_conversation_messages_key(self, conversation_id: str) -> str:
+        """Get Redis key for a conversation's message list"""
+        return f"{self.conversation_prefix}{conversation_id}{self.conversation_messages_suffix}"
     
-    async def save_conversation(self, conversation_id: str, conversation_data: Dict[str, Any]) -> bool:
-        """Save a conversation to Redis"""
+    async def save_conversation(
+        self, conversation_id: str, conversation_data: Dict[str, Any], append: bool = False
+    ) -> bool:
+        """
+        Save a conversation to Redis as a metadata hash plus a message list.
+
+        With append, the given messages are added to the end of the stored
+        list instead of replacing it. Messages already encoded as JSON
+        strings are stored as they are.
+        """
         try:
-            key = self._get_conversation_key(conversation_id)
-            serializable_data = self._prepare_for_serialization(conversation_data)
-            serialized = json.dumps(serializable_data)
-            return await self.redis_client.set(key, serialized)
+            try:
+                await self._write_conversation(conversation_id, conversation_data, append)
+            except redis.ResponseError:
+                # A key still in the old single-string layout fails with WRONGTYPE;
+                # migrate it and retry, any other error recurs on the retry
+                await self._migrate_legacy_conversation(conversation_id)
+                await self._write_conversation(conversation_id, conversation_data, append)
+            return True
         except Exception as e:
-            print(f"Error saving conversation to Redis: {e}")
+            logger.error("Error saving conversation to Redis: %s", e)
             return False
+
+    async def _write_conversation(
+        self, conversation_id: str, conversation_data: Dict[str, Any], append: bool
+    ):
+        """Write a conversation's metadata and messages in one transaction"""
+        key = self._get_conversation_key(conversation_id)
+        messages_key = self._get_conversation_messages_key(conversation_id)
+        updated_at = conversation_data.get("updated_at")
+        score = updated_at.timestamp() if hasattr(updated_at, "timestamp") else time.time()
+
+        # orjson encodes datetimes itself, so the data is written without a converted copy
+        meta = {
+            field: orjson.dumps(value)
+            for field, value in conversation_data.items()
+            if field != "messages"
+        }
+        messages = conversation_data.get("messages", [])
+
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            if not append:
+                pipe.delete(key, messages_key)
+            pipe.hset(key, mapping=meta)
+            if messages:
+                pipe.rpush(
+                    messages_key,
+                    *[
+                        message if isinstance(message, str) else orjson.dumps(message)
+                        for message in messages
+                    ],
+                )
+            pipe.zadd(self.conversation_index_key, {conversation_id: score})
+            await pipe.execute()
     
     async def get_conversation(self, conversation_id: str) -> Optional[Dict[str, Any]]:
         """Get a conversation from Redis"""
+        raw = await self.get_conversation_raw(conversation_id)
+        if raw:
+            data, messages = raw
+            data["messages"] = [orjson.loads(message) for message in messages]
+            return data
+        return None
+
+    async def get_conversation_raw(self, conversation_id: str) -> Optional[Tuple[Dict[str, Any], List[str]]]:
+        """Get a conversation's metadata and its messages as the stored JSON strings"""
         try:
-            key = self._get_conversation_key(conversation_id)
-            data = await self.redis_client.get(key)
-            if data:
-                return json.loads(data)
-            return None
+            try:
+                return await self._read_conversation_raw(conversation_id)
+            except redis.ResponseError:
+                # See save_conversation: old single-string keys are migrated on first use
+                await self._migrate_legacy_conversation(conversation_id)
+                return await self._read_conversation_raw(conversation_id)
         except Exception as e:
-            print(f"Error getting conversation from Redis: {e}")
+            logger.error("Error getting conversation from Redis: %s", e)
             return None
+
+    async def _read_conversation_raw(self, conversation_id: str) -> Optional[Tuple[Dict[str, Any], List[str]]]:
+        """Read a conversation's metadata hash and message list in one round trip"""
+        key = self._get_conversation_key(conversation_id)
+        messages_key = self._get_conversation_messages_key(conversation_id)
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            pipe.hgetall(key)
+            pipe.lrange(messages_key, 0, -1)
+            meta, messages = await pipe.execute()
+        if meta:
+            return {field: orjson.loads(value) for field, value in meta.items()}, messages
+        return None
+
+    async def _migrate_legacy_conversation(self, conversation_id: str) -> bool:
+        """
+        Rewrite a conversation stored by earlier versions as a single JSON
+        string into the metadata hash plus message list, and index it.
+
+        Returns whether the conversation was migrated by this call.
+        """
+        key = self._get_conversation_key(conversation_id)
+        messages_key = self._get_conversation_messages_key(conversation_id)
+        try:
+            async with self.redis_client.pipeline(transaction=True) as pipe:
+                # Watched so a concurrent migration or save is never overwritten
+                await pipe.watch(key)
+                if await pipe.type(key) not in ("string", b"string"):
+                    return False
+                data = orjson.loads(await pipe.get(key))
+                messages = data.pop("messages", None) or []
+                updated_at = data.get("updated_at")
+                score = datetime.fromisoformat(updated_at).timestamp() if updated_at else time.time()
+
+                pipe.multi()
+                pipe.delete(key, messages_key)
+                pipe.hset(key, mapping={field: orjson.dumps(value) for field, value in data.items()})
+                if messages:
+                    pipe.rpush(messages_key, *[orjson.dumps(message) for message in messages])
+                pipe.zadd(self.conversation_index_key, {conversation_id: score})
+                await pipe.execute()
+        except redis.WatchError:
+            return False
+        logger.info("Migrated conversation %s to the hash and list layout", conversation_id)
+        return True
+
+    async def migrate_legacy_conversations(self) -> int:
+        """Migrate every conversation still stored as a single JSON string; returns how many were"""
+        migrated = 0
+        try:
+            async for key in self.redis_client.scan_iter(
+                match=f"{self.conversation_prefix}*", count=500, _type="string"
+            ):
+                if isinstance(key, bytes):
+                    key = key.decode()
+                if await self._migrate_legacy_conversation(key[len(self.conversation_prefix):]):
+                    migrated += 1
+        except Exception as e:
+            logger.error("Error migrating conversations in Redis: %s", e)
+        return migrated
     
     async def delete_conversation(self, conversation_id: str) -> bool:
         """Delete a conversation from Redis"""
         try:
             key = self._get_conversation_key(conversation_id)
-            return bool(await self.redis_client.delete(key))
+            messages_key = self._get_conversation_messages_key(conversation_id)
+            async with self.redis_client.pipeline(transaction=True) as pipe:
+                pipe.delete(key, messages_key)
+                pipe.zrem(self.conversation_index_key, conversation_id)
+                deleted, _ = await pipe.execute()
+            return bool(deleted)
         except Exception as e:
-            print(f"Error deleting conversation from Redis: {e}")
+            logger.error("Error deleting conversation from Redis: %s", e)
             return False
     
-    async def get_all_conversation_keys(self) -> list[str]:
-        """Get all conversation keys from Redis"""
+    async def get_all_conversation_keys(self, offset: int = 0, limit: Optional[int] = None) -> list[str]:
+        """Get conversation IDs from Redis, most recently updated first"""
+        try:
+            end = -1 if limit is None else offset + limit - 1
+            return await self.redis_client.zrevrange(self.conversation_index_key, offset, end)
+        except Exception as e:
+            logger.error("Error getting conversation keys from Redis: %s", e)
+            return []
+
+    async def count_conversations(self) -> int:
+        """Get the number of stored conversations"""
+        try:
+            return await self.redis_client.zcard(self.conversation_index_key)
+        except Exception as e:
+            logger.error("Error counting conversations in Redis: %s", e)
+            return 0
+
+    async def get_conversation_summaries(self, conversation_ids: List[str]) -> List[Dict[str, Any]]:
+        """Get the metadata and message count of several conversations in one round trip"""
         try:
-            pattern = f"{self.conversation_prefix}*"
-            keys = await self.redis_client.keys(pattern)
-            return [key.replace(self.conversation_prefix, "") for key in keys]
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for conversation_id in conversation_ids:
+                    pipe.hgetall(self._get_conversation_key(conversation_id))
+                    pipe.llen(self._get_conversation_messages_key(conversation_id))
+                results = await pipe.execute()
+
+            summaries = []
+            for meta, message_count in zip(results[::2], results[1::2]):
+                if meta:
+                    summary = {field: orjson.loads(value) for field, value in meta.items()}
+                    summary["message_count"] = message_count
+                    summaries.append(summary)
+            return summaries
         except Exception as e:
-            print(f"Error getting conversation keys from Redis: {e}")
+            logger.error("Error getting conversation summaries from Redis: %s", e)
             return []
 
     def _get_character_key(self, character_id: str) -> str:
@@ -64,18 +225,19 @@ class RedisClient:
 
     async def save_character(self, character_id: str, character_data: Dict[str, Any]) -> bool:
         """Save a character to Redis"""
+        return await self.save_characters({character_id: character_data})
+
+    async def save_characters(self, characters: Dict[str, Dict[str, Any]]) -> bool:
+        """Save several characters, keyed by ID, to Redis in one round trip"""
         try:
-            key = self._get_character_key(character_id)
-            serializable_data = self._prepare_for_serialization(character_data)
-            serialized = json.dumps(serializable_data)
-            success = await self.redis_client.set(key, serialized)
-            
-            if success:
-                await self.redis_client.sadd(self.character_list_key, character_id)
-            
-            return success
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for character_id, character_data in characters.items():
+                    pipe.set(self._get_character_key(character_id), orjson.dumps(character_data))
+                pipe.sadd(self.character_list_key, *characters)
+                results = await pipe.execute()
+            return all(results[:-1])
         except Exception as e:
-            print(f"Error saving character to Redis: {e}")
+            logger.error("Error saving characters to Redis: %s", e)
             return False
 
     async def get_character(self, character_id: str) -> Optional[Dict[str, Any]]:
@@ -84,59 +246,36 @@ class RedisClient:
             key = self._get_character_key(character_id)
             data = await self.redis_client.get(key)
             if data:
-                return json.loads(data)
+                return orjson.loads(data)
             return None
         except Exception as e:
-            print(f"Error getting character from Redis: {e}")
+            logger.error("Error getting character from Redis: %s", e)
             return None
 
     async def get_all_characters(self) -> List[Dict[str, Any]]:
         """Get all characters from Redis"""
         try:
             character_ids = await self.redis_client.smembers(self.character_list_key)
-            characters = []
-            for char_id in character_ids:
-                char_data = await self.get_character(char_id)
-                if char_data:
-                    characters.append(char_data)
-            return characters
+            if not character_ids:
+                return []
+            keys = [self._get_character_key(char_id) for char_id in character_ids]
+            return [orjson.loads(data) for data in await self.redis_client.mget(keys) if data]
         except Exception as e:
-            print(f"Error getting all characters from Redis: {e}")
+            logger.error("Error getting all characters from Redis: %s", e)
             return []
 
     async def delete_character(self, character_id: str) -> bool:
         """Delete a character from Redis"""
         try:
             key = self._get_character_key(character_id)
-            success = bool(await self.redis_client.delete(key))
-            if success:
-                await self.redis_client.srem(self.character_list_key, character_id)
-            return success
+            async with self.redis_client.pipeline(transaction=True) as pipe:
+                pipe.delete(key)
+                pipe.srem(self.character_list_key, character_id)
+                deleted, _ = await pipe.execute()
+            return bool(deleted)
         except Exception as e:
-            print(f"Error deleting character from Redis: {e}")
+            logger.error("Error deleting character from Redis: %s", e)
             return False
 
-    def _prepare_for_serialization(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Prepare data for JSON serialization by converting datetime objects"""
-        import copy
-        serializable_data = copy.deepcopy(data)
-        
-        def convert_datetime(obj):
-            if isinstance(obj, dict):
-                for key, value in obj.items():
-                    if hasattr(value, 'isoformat'):
-                        obj[key] = value.isoformat()
-                    elif isinstance(value, (dict, list)):
-                        convert_datetime(value)
-            elif isinstance(obj, list):
-                for i, item in enumerate(obj):
-                    if hasattr(item, 'isoformat'):
-                        obj[i] = item.isoformat()
-                    elif isinstance(item, (dict, list)):
-                        convert_datetime(item)
-        
-        convert_datetime(serializable_data)
-        return serializable_data
-
 
 redis_client = RedisClient() 
\ No newline at end of file
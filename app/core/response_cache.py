@@ -0,0 +1,64 @@
+import hashlib
+import logging
+import re
+from typing import Optional
+import redis.asyncio as redis
+from app.core.config import get_redis_client, settings
+
+logger = logging.getLogger(__name__)
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class ResponseCache:
+    """Redis cache of character responses keyed by character, mood and therapist message"""
+
+    def __init__(self):
+        self.prefix = "response_cache:"
+        self.ttl = settings.RESPONSE_CACHE_TTL
+        self.bucket_size = settings.RESPONSE_CACHE_BUCKET_SIZE
+
+    @property
+    def redis_client(self) -> redis.Redis:
+        """The shared Redis connection, created on first use"""
+        return get_redis_client()
+
+    def _normalize(self, message: str) -> str:
+        """Fold case, punctuation and spacing so trivially different phrasings share a key"""
+        message = _PUNCTUATION.sub(" ", message.lower())
+        return _WHITESPACE.sub(" ", message).strip()
+
+    def _get_key(self, character_id: str, emotional_state: int, message: str) -> str:
+        """Get Redis key for a response, bucketing the emotional state so cached replies stay in mood"""
+        bucket = emotional_state // self.bucket_size
+        digest = hashlib.sha256(self._normalize(message).encode()).hexdigest()
+        return f"{self.prefix}{character_id}:{bucket}:{digest}"
+
+    async def get(self, character_id: str, emotional_state: int, message: str) -> Optional[str]:
+        """Get a cached response as its JSON text"""
+        try:
+            return await self.redis_client.get(self._get_key(character_id, emotional_state, message))
+        except Exception as e:
+            logger.error("Error reading response cache: %s", e)
+            return None
+
+    async def set(self, character_id: str, emotional_state: int, message: str, response_json: str) -> bool:
+        """Cache a response given as its JSON text"""
+        try:
+            key = self._get_key(character_id, emotional_state, message)
+            return bool(await self.redis_client.set(key, response_json, ex=self.ttl))
+        except Exception as e:
+            logger.error("Error writing response cache: %s", e)
+            return False
+
+    async def delete(self, character_id: str, emotional_state: int, message: str) -> bool:
+        """Drop a cached response"""
+        try:
+            return bool(await self.redis_client.delete(self._get_key(character_id, emotional_state, message)))
+        except Exception as e:
+            logger.error("Error deleting from response cache: %s", e)
+            return False
+
+
+response_cache = ResponseCache()
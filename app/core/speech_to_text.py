@@ -1,7 +1,11 @@
-import os
+import asyncio
+import logging
 import time
-from typing import Optional
-import tempfile
+from typing import BinaryIO, Optional, Union
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
 
 
 def get_device():
@@ -20,7 +24,7 @@ def get_device():
 def get_compute_type(device: str):
     """Get the best compute type for the device."""
     if device == "cuda":
-        return "float16"
+        return "int8_float16"
     else:
         return "int8"
 
@@ -43,40 +47,62 @@ class FasterWhisperProvider:
             if compute_type is None:
                 compute_type = get_compute_type(device)
 
-            print(
-                f"Initializing Faster Whisper with device={device}, compute_type={compute_type}"
+            logger.info(
+                "Initializing Faster Whisper with device=%s, compute_type=%s", device, compute_type
             )
 
             self.model = WhisperModel(
-                model_size, device=device, compute_type=compute_type
+                model_size,
+                device=device,
+                compute_type=compute_type,
+                cpu_threads=settings.STT_CPU_THREADS,
+                num_workers=settings.STT_NUM_WORKERS,
             )
             self.device = device
             self.compute_type = compute_type
+            # Only the text is used, so no timestamps or cross-segment conditioning
+            self.transcribe_options = {
+                "beam_size": settings.STT_BEAM_SIZE,
+                "vad_filter": settings.STT_VAD_FILTER,
+                "vad_parameters": {"min_silence_duration_ms": settings.STT_VAD_MIN_SILENCE_MS},
+                "condition_on_previous_text": False,
+                "without_timestamps": True,
+            }
 
         except ImportError:
             raise ImportError(
                 "Faster Whisper not installed. Run: pip install faster-whisper"
             )
 
-    async def transcribe(self, bytes_audio: bytes, filename: str) -> str:
+    def warm_up(self):
+        """Run one transcription of silence so the first request does not pay for model start-up"""
+        import numpy as np
+
+        started = time.perf_counter()
+        # VAD would drop the silence before it reached the model, so it is turned off here
+        segments, _ = self.model.transcribe(
+            np.zeros(16000, dtype=np.float32), **{**self.transcribe_options, "vad_filter": False}
+        )
+        for _ in segments:
+            pass
+        logger.info("Faster Whisper (%s) warmed up in %.3f seconds", self.device, time.perf_counter() - started)
+
+    def _transcribe_sync(self, audio: Union[str, BinaryIO]) -> str:
+        """Run the model to completion; segments are decoded lazily, so they are consumed here"""
+        segments, _ = self.model.transcribe(audio, **self.transcribe_options)
+        return " ".join([segment.text for segment in segments])
+
+    async def transcribe(self, audio: Union[str, BinaryIO], filename: str) -> str:
         """Transcribe audio using Faster Whisper."""
 
-        start_time = time.time()
+        started = time.perf_counter()
 
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-            temp_file.write(bytes_audio)
-            temp_file_path = temp_file.name
+        # Inference takes seconds and releases the GIL, so it runs off the event loop
+        transcript = await asyncio.to_thread(self._transcribe_sync, audio)
 
-        try:
-            segments, _ = self.model.transcribe(temp_file_path)
-            transcript = " ".join([segment.text for segment in segments])
-        finally:
-            os.unlink(temp_file_path)
-
-        end_time = time.time()
-        latency = end_time - start_time
-        print(
-            f"Faster Whisper ({self.device}) transcription latency: {latency:.2f} seconds"
+        latency = time.perf_counter() - started
+        logger.info(
+            "Faster Whisper (%s) transcription latency: %.3f seconds", self.device, latency
         )
 
         return transcript.strip()
@@ -85,18 +111,18 @@ class FasterWhisperProvider:
 speech_to_text_provider = FasterWhisperProvider()
 
 
-async def transcribe_audio(bytes_audio: bytes, filename: str) -> str:
+async def transcribe_audio(audio: Union[str, BinaryIO], filename: str) -> str:
     """
     Transcribe audio file to text using Faster Whisper.
 
     Args:
-        bytes_audio (bytes): The audio file content as bytes
+        audio (str | BinaryIO): Path to the audio file, or the open file; either is decoded as it is read
         filename (str): The name of the audio file
 
     Returns:
         str: Transcribed text
     """
-    return await speech_to_text_provider.transcribe(bytes_audio, filename)
+    return await speech_to_text_provider.transcribe(audio, filename)
 
 
 def create_provider(
@@ -1,23 +1,27 @@
+import contextlib
 import os
+import uuid
 from pathlib import Path
-from enum import Enum
+from typing import Any, Dict, Optional
 
+import aiofiles
 from pydantic import BaseModel, Field
-from app.core.config import llm_client
-from pydub import AudioSegment
+from app.core.config import get_llm_client
 from app.core.llm import get_character
+# Re-exported so existing imports of text_to_speech.TTSVoice keep resolving to the same class
+from app.core.llm import TTSVoice  # noqa: F401
 
 
-class TTSVoice(str, Enum):
-    """Available TTS voices for character speech"""
-    ASH = "ash"
-    BALLAD = "ballad"
-    FABLE = "fable"
-    CORAL = "coral"
-    ONYX = "onyx"
-    NOVA = "nova"
-    SHIMMER = "shimmer"
-    VERSE = "verse"
+# Output formats the speech API can produce directly, by file extension
+_TTS_RESPONSE_FORMATS = {
+    ".mp3": "mp3",
+    ".opus": "opus",
+    ".ogg": "opus",
+    ".aac": "aac",
+    ".flac": "flac",
+    ".wav": "wav",
+    ".pcm": "pcm",
+}
 
 
 class TTSRequest(BaseModel):
@@ -27,18 +31,19 @@ class TTSRequest(BaseModel):
     character_id: str = Field(..., description="Character UUID to get voice settings from")
 
 
-async def generate_tts(request: TTSRequest):
+async def generate_tts(request: TTSRequest, character: Optional[Dict[str, Any]] = None):
     """
     Generate text-to-speech audio using OpenAI's gpt-4o-mini-tts model.
     
     Args:
         request: TTSRequest containing text, voice, and optional parameters
+        character: The request's character if the caller already has it, saving a lookup
         
     Returns:
         None (writes audio to stored_file_path)
         
     Raises:
-        ValueError: If text is empty or too long
+        ValueError: If text is empty or too long, or the file extension is not a supported format
         Exception: If TTS generation fails
     """
     if not request.text.strip():
@@ -48,6 +53,13 @@ async def generate_tts(request: TTSRequest):
         raise ValueError("Text is too long (max 4000 characters)")
     
     full_text = request.text
+
+    ext = os.path.splitext(request.stored_file_path)[1].lower() or ".mp3"
+    response_format = _TTS_RESPONSE_FORMATS.get(ext)
+    if response_format is None:
+        raise ValueError(
+            f"Unsupported audio format {ext} (supported: {', '.join(_TTS_RESPONSE_FORMATS)})"
+        )
     
     try:
         # Ensure the directory exists
@@ -55,31 +67,35 @@ async def generate_tts(request: TTSRequest):
         if output_dir:
             Path(output_dir).mkdir(parents=True, exist_ok=True)
         
-        # Fetch character from Redis to get voice and instructions
-        character = await get_character(request.character_id)
+        # Fetch character to get voice and instructions
+        if character is None:
+            character = await get_character(request.character_id)
         if not character:
             raise Exception(f"Character {request.character_id} not found in Redis")
         voice = character.get("voice_selection", "alloy")
         voice_instructions = character.get("voice_instructions", "")
         
-        response = await llm_client.audio.speech.create(
-            model="gpt-4o-mini-tts",
-            voice=voice,
-            input=full_text,
-            instructions=voice_instructions
-        )
-        
-        with open(request.stored_file_path, "wb") as f:
-            f.write(response.content)
-        
-        ext = os.path.splitext(request.stored_file_path)[1].lower()
-        if ext != ".mp3":
-            temp_mp3_path = request.stored_file_path + ".temp.mp3"
-            os.rename(request.stored_file_path, temp_mp3_path)
-            audio = AudioSegment.from_file(temp_mp3_path, format="mp3")
-            audio.export(request.stored_file_path, format=ext[1:])
-            os.remove(temp_mp3_path)
-            
+        # Written to disk as it downloads, rather than buffering the whole file in memory.
+        # It goes to a temporary file renamed on completion, so a failed download never
+        # leaves a truncated file at the output path
+        partial_path = f"{request.stored_file_path}.{uuid.uuid4().hex}.part"
+        try:
+            async with get_llm_client().audio.speech.with_streaming_response.create(
+                model="gpt-4o-mini-tts",
+                voice=voice,
+                input=full_text,
+                instructions=voice_instructions,
+                response_format=response_format,
+            ) as response:
+                async with aiofiles.open(partial_path, "wb") as f:
+                    async for chunk in response.iter_bytes(64 * 1024):
+                        await f.write(chunk)
+            os.replace(partial_path, request.stored_file_path)
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(partial_path)
+            raise
+
     except Exception as e:
         raise Exception(f"Failed to generate TTS: {str(e)}")
 
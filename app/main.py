@@ -1,11 +1,38 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from starlette.middleware.cors import CORSMiddleware
 
 from app.api.main import api_router
 from app.core.config import settings
+from app.core.redis_client import redis_client
+from app.core.speech_to_text import speech_to_text_provider
+
+logging.basicConfig(
+    level=settings.LOG_LEVEL,
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+)
+# httpx logs every outgoing LLM request at INFO
+logging.getLogger("httpx").setLevel(max(logging.WARNING, logging.getLogger().level))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Optionally migrate legacy conversations, and warm up the speech-to-text model before serving requests"""
+    if settings.MIGRATE_LEGACY_CONVERSATIONS_ON_STARTUP:
+        await redis_client.migrate_legacy_conversations()
+    if settings.STT_WARMUP:
+        await asyncio.to_thread(speech_to_text_provider.warm_up)
+    yield
+
 
 app = FastAPI(
     title="Dead Inside Backend API",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
 if settings.all_cors_origins:
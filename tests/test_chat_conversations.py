@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 """End-to-end test for the therapy system using API endpoints"""
 
+import json
+
 import pytest
 import httpx
 from rich.console import Console
@@ -18,19 +20,25 @@ class TherapySystemTestRunner:
         self.test_results = []
         self.base_url = "http://localhost:8000"
 
-    async def generate_test_characters(self, num_characters: int, theme: str = "urban coffee shop"):
+    async def generate_test_characters(
+        self, num_characters: int, theme: str = "urban coffee shop", force_refresh: bool = False
+    ):
         """Generate characters for testing via API"""
         with console.status(
             f"[bold green]Generating {num_characters} test characters via API...", spinner="dots"
         ):
             try:
                 async with httpx.AsyncClient(timeout=60.0) as client:
-                    console.print(f"[dim]Making request to: {self.base_url}/legacy/chat/characters/generate[/dim]")
+                    console.print(f"[dim]Making request to: {self.base_url}/chat/characters/generate[/dim]")
                     console.print(f"[dim]Request data: {{'theme': '{theme}', 'num_characters': {num_characters}}}[/dim]")
                     
                     response = await client.post(
-                        f"{self.base_url}/legacy/chat/characters/generate",
-                        json={"theme": theme, "num_characters": num_characters}
+                        f"{self.base_url}/chat/characters/generate",
+                        json={
+                            "theme": theme,
+                            "num_characters": num_characters,
+                            "force_refresh": force_refresh,
+                        }
                     )
                     
                     console.print(f"[dim]Response status: {response.status_code}[/dim]")
@@ -60,7 +68,7 @@ class TherapySystemTestRunner:
         try:
             async with httpx.AsyncClient(timeout=30.0) as client:
                 response = await client.post(
-                    f"{self.base_url}/legacy/chat/conversations",
+                    f"{self.base_url}/chat/conversations",
                     json={
                         "message": message,
                         "character_id": character_id
@@ -84,7 +92,7 @@ class TherapySystemTestRunner:
         try:
             async with httpx.AsyncClient(timeout=30.0) as client:
                 response = await client.post(
-                    f"{self.base_url}/legacy/chat/conversations/{conversation_id}/messages",
+                    f"{self.base_url}/chat/conversations/{conversation_id}/messages",
                     json={
                         "message": message,
                         "character_id": character_id
@@ -105,7 +113,7 @@ class TherapySystemTestRunner:
         """List all conversations via API"""
         try:
             async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(f"{self.base_url}/legacy/chat/conversations")
+                response = await client.get(f"{self.base_url}/chat/conversations")
                 
                 if response.status_code == 200:
                     data = response.json()
@@ -118,11 +126,78 @@ class TherapySystemTestRunner:
             console.print(f"[red]❌ List error: {str(e)}[/red]")
             return []
 
+    async def read_events(self, response: httpx.Response):
+        """Parse a server-sent events response into (event, data) pairs"""
+        assert response.headers["content-type"].startswith("text/event-stream")
+
+        events = []
+        event = None
+        async for line in response.aiter_lines():
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                assert event is not None, "data line without an event line"
+                events.append((event, json.loads(line[len("data: "):])))
+                event = None
+        return events
+
+    async def stream_character_generation(self, num_characters: int, theme: str):
+        """Generate characters via the streaming API, returning its events"""
+        async with httpx.AsyncClient(timeout=120.0) as client:
+            async with client.stream(
+                "POST",
+                f"{self.base_url}/chat/characters/generate/stream",
+                json={"theme": theme, "num_characters": num_characters},
+            ) as response:
+                assert response.status_code == 200
+                return await self.read_events(response)
+
+    async def stream_therapy_session(
+        self, character_id: str, message: str, conversation_id: str = None
+    ):
+        """Start or continue a therapy session via the streaming API, returning its events"""
+        async with httpx.AsyncClient(timeout=60.0) as client:
+            async with client.stream(
+                "POST",
+                f"{self.base_url}/chat/conversations/stream",
+                json={
+                    "message": message,
+                    "character_id": character_id,
+                    "conversation_id": conversation_id,
+                },
+            ) as response:
+                assert response.status_code == 200
+                events = await self.read_events(response)
+
+        if events and events[-1][0] == "final":
+            conversation_id = events[-1][1]["conversation_id"]
+            if conversation_id not in self.conversations:
+                self.conversations.append(conversation_id)
+        return events
+
+    async def get_character_details(self, character_id: str):
+        """Get character details via API"""
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            response = await client.get(f"{self.base_url}/chat/characters/{character_id}")
+            assert response.status_code == 200
+            return response.json()
+
+    async def list_conversations_page(self, offset: int = 0, limit: int = None):
+        """List one page of conversations via API, returning the full response"""
+        params = {"offset": offset}
+        if limit is not None:
+            params["limit"] = limit
+
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            response = await client.get(f"{self.base_url}/chat/conversations", params=params)
+            assert response.status_code == 200
+            return response.json()
+
     async def get_conversation_details(self, conversation_id: str):
         """Get conversation details via API"""
         try:
             async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(f"{self.base_url}/legacy/chat/conversations/{conversation_id}")
+                response = await client.get(f"{self.base_url}/chat/conversations/{conversation_id}")
                 
                 if response.status_code == 200:
                     return response.json()
@@ -151,7 +226,7 @@ class TherapySystemTestRunner:
                 for i, conv_id in enumerate(self.conversations):
                     try:
                         async with httpx.AsyncClient(timeout=10.0) as client:
-                            response = await client.delete(f"{self.base_url}/legacy/chat/conversations/{conv_id}")
+                            response = await client.delete(f"{self.base_url}/chat/conversations/{conv_id}")
                             
                             if response.status_code == 200:
                                 progress.update(
@@ -174,7 +249,7 @@ class TherapySystemTestRunner:
         
         try:
             async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.delete(f"{self.base_url}/legacy/chat/cleanup")
+                response = await client.delete(f"{self.base_url}/chat/cleanup")
                 
                 if response.status_code == 200:
                     result = response.json()
@@ -322,6 +397,173 @@ async def test_fast_therapy_system_e2e():
     )
 
 
+def assert_stream_framing(events):
+    """A stream is one or more delta events followed by exactly one final event"""
+    assert events, "stream produced no events"
+    names = [name for name, _ in events]
+    assert "error" not in names, f"stream failed: {events[-1][1]}"
+    assert names[-1] == "final"
+    assert names.count("final") == 1
+    assert set(names[:-1]) == {"delta"}
+    assert "".join(data for _, data in events[:-1]).strip()
+
+
+@pytest.mark.asyncio
+async def test_streamed_multi_turn_session():
+    """A streamed session continued over the stream and JSON paths, read back turn by turn"""
+    runner = TherapySystemTestRunner()
+    await runner.cleanup_all_data()
+
+    try:
+        response = await runner.generate_test_characters(1, "rainy bus stop")
+        character = response["characters"][0]
+
+        console.print("\n[bold cyan]Step 1: Streamed Session[/bold cyan]")
+        therapist_messages = [
+            "Hi, I'm here to listen. What's been on your mind?",
+            "That sounds hard. How long has it been like this?",
+            "Thank you for telling me. What would help right now?",
+        ]
+        events = await runner.stream_therapy_session(character["id"], therapist_messages[0])
+        assert_stream_framing(events)
+        first_turn = events[-1][1]
+        conversation_id = first_turn["conversation_id"]
+        assert 0 <= first_turn["emotional_state"] <= 100
+        console.print(f"[green]✅ Streamed session started: {conversation_id}[/green]")
+
+        console.print("\n[bold cyan]Step 2: Appending Turns[/bold cyan]")
+        events = await runner.stream_therapy_session(
+            character["id"], therapist_messages[1], conversation_id
+        )
+        assert_stream_framing(events)
+        assert events[-1][1]["conversation_id"] == conversation_id
+
+        follow_up = await runner.add_message_to_session(
+            conversation_id, character["id"], therapist_messages[2]
+        )
+        assert follow_up and follow_up["conversation_id"] == conversation_id
+
+        details = await runner.get_conversation_details(conversation_id)
+        roles = [message["role"] for message in details["messages"]]
+        assert roles == ["user", "assistant"] * len(therapist_messages)
+        assert [m["content"] for m in details["messages"][::2]] == therapist_messages
+        assert details["messages"][-1]["id"] == follow_up["message_id"]
+        assert details["messages"][-1]["timestamp"] == follow_up["timestamp"]
+        console.print(f"[green]✅ {len(roles)} messages round-tripped in order[/green]")
+    finally:
+        await runner.cleanup_all_data()
+
+
+@pytest.mark.asyncio
+async def test_conversation_pagination():
+    """Paged session listings cover every session once and report the full total"""
+    runner = TherapySystemTestRunner()
+    await runner.cleanup_all_data()
+
+    try:
+        response = await runner.generate_test_characters(1, "rainy bus stop")
+        character = response["characters"][0]
+        for message in ("Hello there.", "How are you feeling today?", "Want to talk about it?"):
+            assert await runner.start_therapy_session(character["id"], message)
+
+        everything = await runner.list_conversations_page()
+        assert everything["total"] == len(everything["conversations"]) == 3
+        updated = [c["updated_at"] for c in everything["conversations"]]
+        assert updated == sorted(updated, reverse=True)
+
+        pages = [await runner.list_conversations_page(offset, 2) for offset in (0, 2, 4)]
+        assert [len(page["conversations"]) for page in pages] == [2, 1, 0]
+        assert all(page["total"] == 3 for page in pages)
+        assert [c["id"] for page in pages for c in page["conversations"]] == [
+            c["id"] for c in everything["conversations"]
+        ]
+        assert all(c["message_count"] == 2 for c in everything["conversations"])
+        console.print("[green]✅ Pages cover every session once and report the full total[/green]")
+    finally:
+        await runner.cleanup_all_data()
+
+
+@pytest.mark.asyncio
+async def test_response_cache():
+    """Replies to equivalent messages are consistent whether or not the server caches them"""
+    runner = TherapySystemTestRunner()
+    await runner.cleanup_all_data()
+
+    try:
+        response = await runner.generate_test_characters(1, "rainy bus stop")
+        character = response["characters"][0]
+
+        # Each session starts in the same mood, and the messages normalize to the same cache key
+        messages = ("Hello there.", "hello,  THERE", "HELLO there!")
+        replies = []
+        for message in messages:
+            reply = await runner.start_therapy_session(character["id"], message)
+            assert reply
+            assert reply["emotional_state"] == min(100, max(0, 50 + reply["emotional_change"]))
+            details = await runner.get_conversation_details(reply["conversation_id"])
+            assert details["messages"][-1]["content"] == reply["response"]
+            replies.append((reply["response"], reply["emotional_change"]))
+
+        # The server's cache setting is not visible here; once a reply is reused, it must keep being reused
+        if replies[0] == replies[1]:
+            assert replies[2] == replies[0]
+            console.print("[green]✅ Repeat messages answered from the cache[/green]")
+        else:
+            console.print("[green]✅ Repeat messages answered fresh; the cache is disabled[/green]")
+    finally:
+        await runner.cleanup_all_data()
+
+
+@pytest.mark.asyncio
+async def test_streamed_character_generation():
+    """Streamed generation sends deltas, then one final event, and saves the characters"""
+    runner = TherapySystemTestRunner()
+    await runner.cleanup_all_data()
+
+    try:
+        events = await runner.stream_character_generation(2, "late night laundromat")
+        assert_stream_framing(events)
+        final = events[-1][1]
+        assert final["total"] == len(final["characters"]) == 2
+        for character in final["characters"]:
+            details = await runner.get_character_details(character["id"])
+            assert details["name"] == character["name"]
+        console.print(f"[green]✅ Streamed {len(events) - 1} deltas and a final event[/green]")
+    finally:
+        await runner.cleanup_all_data()
+
+
+@pytest.mark.asyncio
+async def test_character_generation_cache():
+    """force_refresh always generates new characters, and replaces them when the server caches themes"""
+    runner = TherapySystemTestRunner()
+    await runner.cleanup_all_data()
+
+    def ids(response):
+        return [character["id"] for character in response["characters"]]
+
+    try:
+        theme = "late night laundromat"
+        first = await runner.generate_test_characters(2, theme)
+        repeat = await runner.generate_test_characters(2, theme)
+        # The server's cache setting is not visible here, so it is inferred from the repeat
+        cached = ids(repeat) == ids(first)
+        if not cached:
+            assert not set(ids(repeat)) & set(ids(first))
+
+        refreshed = await runner.generate_test_characters(2, theme, force_refresh=True)
+        assert not set(ids(refreshed)) & (set(ids(first)) | set(ids(repeat)))
+
+        again = await runner.generate_test_characters(2, theme)
+        if cached:
+            assert ids(again) == ids(refreshed)
+        else:
+            assert not set(ids(again)) & set(ids(refreshed))
+        console.print(f"[green]✅ force_refresh behaves as expected; the cache is {'on' if cached else 'off'}[/green]")
+    finally:
+        await runner.cleanup_all_data()
+
+
 @pytest.mark.asyncio
 async def test_interactive_therapy_session():
     """Interactive terminal-based therapy session"""
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 """End-to-end test for the zombie interaction system using API endpoints"""
 
+import json
 import pytest
 import httpx
 import os
@@ -158,6 +159,33 @@ class ZombieInteractionTestRunner:
             console.print(f"[red]❌ Exception type: {type(e).__name__}[/red]")
             raise
 
+    async def stream_zombie_interaction(self, character_id: str, audio_file_path: str = None):
+        """Run a zombie interaction via the streaming API, returning its events"""
+        request = {"character_id": character_id}
+        if audio_file_path:
+            request["audio_file_path"] = audio_file_path
+
+        async with httpx.AsyncClient(timeout=120.0) as client:
+            async with client.stream("POST", f"{self.base_url}/zombie/stream", json=request) as response:
+                if response.status_code != 200:
+                    await response.aread()
+                    raise Exception(f"API error: {response.status_code} - {response.text}")
+                assert response.headers["content-type"].startswith("text/event-stream")
+
+                events = []
+                event = None
+                async for line in response.aiter_lines():
+                    if line.startswith("event: "):
+                        event = line[len("event: "):]
+                    elif line.startswith("data: "):
+                        events.append((event, json.loads(line[len("data: "):])))
+                return events
+
+    async def zombie_batch(self, items: list):
+        """Run several zombie interactions via the batch API, returning the response"""
+        async with httpx.AsyncClient(timeout=120.0) as client:
+            return await client.post(f"{self.base_url}/zombie/batch", json={"items": items})
+
     async def cleanup_all_data(self):
         """Clean up all data via API"""
         console.print(Panel("[bold red]Cleaning up all test data[/bold red]"))
@@ -378,4 +406,79 @@ async def test_zombie_interaction_error_cases():
             "[bold green]✅ Error Case Tests Complete![/bold green]",
             border_style="green",
         )
-    ) 
\ No newline at end of file
+    ) 
+
+
+@pytest.mark.asyncio
+async def test_zombie_interaction_error_precedence():
+    """An unknown character is reported before any problem with the audio file"""
+    runner = ZombieInteractionTestRunner()
+
+    try:
+        await runner.test_zombie_interaction("invalid-uuid", "/path/to/nonexistent/file.wav")
+        raise AssertionError("Should have failed with invalid character ID")
+    except Exception as e:
+        assert "404" in str(e) and "Character not found" in str(e)
+    console.print("[green]✅ Invalid character reported first[/green]")
+
+
+@pytest.mark.asyncio
+async def test_zombie_batch():
+    """Batched interactions report failures per item and reject duplicate characters"""
+    runner = ZombieInteractionTestRunner()
+    await runner.cleanup_all_data()
+
+    try:
+        response = await runner.generate_test_characters(2, "missed last train")
+        first, second = response["characters"]
+
+        batch = await runner.zombie_batch(
+            [{"character_id": first["id"]}, {"character_id": "invalid-uuid"}, {"character_id": second["id"]}]
+        )
+        assert batch.status_code == 200
+        results = batch.json()["results"]
+        assert [result["character_id"] for result in results] == [first["id"], "invalid-uuid", second["id"]]
+        assert [result["status_code"] for result in results] == [200, 404, 200]
+        assert results[0]["response"]["character_response"] and results[2]["response"]["character_response"]
+        assert results[1]["response"] is None and results[1]["error"] == "Character not found"
+        console.print("[green]✅ Failing item reported without affecting the others[/green]")
+
+        duplicate = await runner.zombie_batch(
+            [{"character_id": second["id"]}, {"character_id": second["id"]}]
+        )
+        assert duplicate.status_code == 400
+        console.print("[green]✅ Duplicate characters rejected[/green]")
+    finally:
+        await runner.cleanup_all_data()
+
+
+@pytest.mark.asyncio
+async def test_zombie_streaming():
+    """A streamed interaction sends its transcription, then deltas, then one final event"""
+    runner = ZombieInteractionTestRunner()
+    await runner.cleanup_all_data()
+
+    try:
+        response = await runner.generate_test_characters(1, "missed last train")
+        character = response["characters"][0]
+
+        events = await runner.stream_zombie_interaction(character["id"])
+        names = [name for name, _ in events]
+        assert "error" not in names, f"stream failed: {events[-1][1]}"
+        assert names[0] == "transcription" and events[0][1] == {"transcription": ""}
+        assert names[-1] == "final" and names.count("final") == 1
+        assert set(names[1:-1]) == {"delta"}
+        final = events[-1][1]
+        assert final["transcription"] == ""
+        assert 0 <= final["emotional_state"] <= 100
+        console.print(f"[green]✅ Streamed {len(events) - 2} deltas and a final event[/green]")
+
+        # Lookup errors are plain HTTP errors raised before the stream starts
+        try:
+            await runner.stream_zombie_interaction("invalid-uuid")
+            raise AssertionError("Should have failed with invalid character ID")
+        except Exception as e:
+            assert "404" in str(e)
+        console.print("[green]✅ Invalid character rejected before streaming[/green]")
+    finally:
+        await runner.cleanup_all_data()